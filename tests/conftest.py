@@ -1,5 +1,7 @@
 import os
 
+import pytest
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 root_dir_content = os.listdir(BASE_DIR)
 PROJECT_DIR_NAME = 'yatube'
@@ -37,3 +39,19 @@ pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True)
+def no_thread_pools(settings):
+    # Поток пула застает общую базу SQLite в памяти заблокированной,
+    # поэтому в этих тестах картинки обрабатываются сразу после коммита,
+    # а загрузки вьюх идут по очереди.
+    settings.THUMBNAIL_WORKERS = 0
+    settings.READ_CONCURRENCY = 0
+
+
+@pytest.fixture(autouse=True)
+def temp_media_root(settings, tmp_path):
+    # Загрузки и миниатюры из этих тестов не должны попадать в media/
+    # проекта.
+    settings.MEDIA_ROOT = str(tmp_path)
@@ -0,0 +1,50 @@
+from django.core.files.storage import default_storage
+
+# Поле ответа -> поле values() поста. Числа комментариев в лентах нет:
+# комментарий сбрасывает только страницу поста, и в закешированной
+# ленте счетчик бы отставал.
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'thumbnail': 'thumbnail_url',
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'created': 'created',
+    'author': 'author__username',
+}
+
+
+def post_values(queryset, prefix='', *extra):
+    """Только те столбцы поста, что попадут в ответ, без моделей."""
+    return queryset.values(
+        *(prefix + field for field in POST_FIELDS.values()), *extra)
+
+
+def serialize_post(row, prefix=''):
+    post = {name: row[prefix + field] for name, field in POST_FIELDS.items()}
+    if post['image']:
+        post['image'] = default_storage.url(post['image'])
+    post['image'] = post['image'] or None
+    post['thumbnail'] = post['thumbnail'] or post['image']
+    return post
+
+
+def serialize_posts(rows, prefix=''):
+    return [serialize_post(row, prefix) for row in rows]
+
+
+def comment_values(queryset):
+    return queryset.values(*COMMENT_FIELDS.values())
+
+
+def serialize_comments(rows):
+    return [
+        {name: row[field] for name, field in COMMENT_FIELDS.items()}
+        for row in rows
+    ]
@@ -0,0 +1,111 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+from posts.tests.utils import QueryBudgetClient
+
+
+class ApiViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Автор')
+        cls.user = User.objects.create_user(username='Читатель')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {i}')
+            for i in range(13)
+        ]
+        cls.post = cls.posts[-1]
+        Comment.objects.create(
+            post=cls.post, author=cls.user, text='Комментарий')
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = QueryBudgetClient()
+
+    def test_feeds_return_posts(self):
+        """Ленты отдают посты в JSON страницами по курсору."""
+        urls = [
+            reverse('api:index'),
+            reverse('api:group', kwargs={'slug': self.group.slug}),
+            reverse('api:profile',
+                    kwargs={'username': self.author.username}),
+            reverse('api:follow_index'),
+        ]
+        self.client.force_login(self.user)
+        for url in urls:
+            with self.subTest(url=url):
+                data = self.client.get(url).json()
+                self.assertEqual(len(data['results']), 10)
+                self.assertEqual(data['results'][0], {
+                    'id': self.post.pk,
+                    'text': self.post.text,
+                    'pub_date': data['results'][0]['pub_date'],
+                    'author': self.author.username,
+                    'group': self.group.slug,
+                    'image': None,
+                    'thumbnail': None,
+                })
+                self.assertIsNone(data['previous'])
+                second = self.client.get(data['next']).json()
+                ids = [post['id'] for post in
+                       data['results'] + second['results']]
+                self.assertEqual(
+                    ids, [post.pk for post in reversed(self.posts)])
+                self.assertIsNone(second['next'])
+
+    def test_post_detail(self):
+        """Пост отдается вместе с комментариями."""
+        data = self.client.get(reverse(
+            'api:post_detail', kwargs={'post_id': self.post.pk})).json()
+        self.assertEqual(data['text'], self.post.text)
+        self.assertEqual(data['comments_count'], 1)
+        self.assertEqual(
+            [comment['text'] for comment in data['comments']],
+            ['Комментарий'])
+        self.assertIsNone(data['comments_next'])
+
+    def test_comment_changes_post_detail(self):
+        """Новый комментарий сразу виден в счетчике поста."""
+        url = reverse('api:post_detail', kwargs={'post_id': self.post.pk})
+        etag = self.client.get(url)['ETag']
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Еще комментарий')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.json()['comments_count'], 2)
+
+    def test_cache_follows_changes(self):
+        """Ответ кешируется и сбрасывается вместе с лентами HTML."""
+        url = reverse('api:index')
+        response = self.client.get(url)
+        repeat = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(repeat.status_code, HTTPStatus.NOT_MODIFIED)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        data = self.client.get(url).json()
+        self.assertEqual(data['results'][0]['id'], post.pk)
+
+    def test_errors(self):
+        """Ошибки тоже отдаются в JSON."""
+        responses = {
+            reverse('api:follow_index'): HTTPStatus.UNAUTHORIZED,
+            reverse('api:group', kwargs={'slug': 'nope'}):
+                HTTPStatus.NOT_FOUND,
+            reverse('api:post_detail', kwargs={'post_id': 0}):
+                HTTPStatus.NOT_FOUND,
+        }
+        for url, status in responses.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status)
+                self.assertIn('detail', response.json())
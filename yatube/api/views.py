@@ -0,0 +1,155 @@
+from functools import partial
+from http import HTTPStatus
+from urllib.parse import urlencode
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
+from django.urls import reverse
+from django.views.decorators.http import require_safe
+
+from core.concurrency import gather
+from posts.feeds import (COMMENTS_COUNT, feed_context, feed_key, not_modified,
+                         set_validators)
+from posts.models import Comment, Group, Post, TimelineEntry, User
+from posts.paginator import paginate
+from posts.timeline import follow_feed
+
+from .serializers import (comment_values, post_values, serialize_comments,
+                          serialize_posts)
+
+
+def json_response(data, status=HTTPStatus.OK):
+    return JsonResponse(
+        data, status=status, encoder=DjangoJSONEncoder,
+        json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')},
+    )
+
+
+def error(detail, status):
+    return json_response({'detail': detail}, status)
+
+
+def page_url(path, cursor):
+    if cursor is None:
+        return None
+    return f'{path}?{urlencode({"cursor": cursor})}'
+
+
+def page_links(path, page_obj):
+    return {
+        'next': page_url(path, page_obj.paginator.next_cursor),
+        'previous': page_url(path, page_obj.paginator.previous_cursor),
+    }
+
+
+def comments_page(request, post_id):
+    comments = comment_values(Comment.objects.filter(post_id=post_id))
+    return paginate(request, comments, COMMENTS_COUNT, key='created',
+                    tiebreak='id', transform=serialize_comments)
+
+
+def feed_response(request, post_list, *scopes):
+    """Страница ленты в JSON через тот же кеш и ETag, что и HTML.
+
+    Посты читаются через values(), в кеш ложатся уже готовые словари.
+    """
+    key = feed_key(request, *scopes)
+    response = not_modified(request, key)
+    if response is not None:
+        return response
+    if post_list.model is TimelineEntry:
+        rows = post_values(post_list, 'post__', 'pub_date', 'post_id')
+        options = {'tiebreak': 'post_id',
+                   'transform': partial(serialize_posts, prefix='post__')}
+    else:
+        rows = post_values(post_list)
+        options = {'tiebreak': 'id', 'transform': serialize_posts}
+    page_obj = feed_context(
+        request, rows, key, namespace='api', **options)['page_obj']
+    response = json_response({
+        'results': page_obj.object_list,
+        **page_links(request.path, page_obj),
+    })
+    return set_validators(request, response, key)
+
+
+@require_safe
+def index(request):
+    return feed_response(request, Post.objects.all(), ('index',))
+
+
+@require_safe
+def group_posts(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True).first()
+    if group_id is None:
+        return error('Группа не найдена.', HTTPStatus.NOT_FOUND)
+    return feed_response(
+        request, Post.objects.filter(group_id=group_id), ('group', group_id))
+
+
+@require_safe
+def profile(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True).first()
+    if author_id is None:
+        return error('Автор не найден.', HTTPStatus.NOT_FOUND)
+    return feed_response(
+        request, Post.objects.filter(author_id=author_id),
+        ('profile', author_id))
+
+
+@require_safe
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return error('Нужно войти.', HTTPStatus.UNAUTHORIZED)
+    post_list, _ = follow_feed(request.user)
+    return feed_response(
+        request, post_list, ('follow', request.user.pk), ('index',))
+
+
+@require_safe
+def post_detail(request, post_id):
+    load_post = post_values(
+        Post.objects.filter(pk=post_id), '', 'author_id', 'group_id',
+        'comments_count').first
+    load_comments = partial(comments_page, request, post_id)
+    if request.META.get('HTTP_IF_NONE_MATCH'):
+        row, comments = load_post(), None
+    else:
+        row, comments = gather(load_post, load_comments)
+    if row is None:
+        return error('Пост не найден.', HTTPStatus.NOT_FOUND)
+    scopes = [('post', post_id), ('profile', row['author_id'])]
+    if row['group_id'] is not None:
+        scopes.append(('group', row['group_id']))
+    key = feed_key(request, *scopes)
+    response = not_modified(request, key)
+    if response is not None:
+        return response
+    if comments is None:
+        comments = load_comments()
+    path = reverse('api:post_comments', kwargs={'post_id': post_id})
+    response = json_response({
+        **serialize_posts([row])[0],
+        'comments_count': row['comments_count'],
+        'comments': comments.object_list,
+        'comments_next': page_url(path, comments.paginator.next_cursor),
+    })
+    return set_validators(request, response, key)
+
+
+@require_safe
+def post_comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        return error('Пост не найден.', HTTPStatus.NOT_FOUND)
+    key = feed_key(request, ('post', post_id))
+    response = not_modified(request, key)
+    if response is not None:
+        return response
+    comments = comments_page(request, post_id)
+    response = json_response({
+        'results': comments.object_list,
+        **page_links(request.path, comments),
+    })
+    return set_validators(request, response, key)
@@ -0,0 +1,138 @@
+import asyncio
+import io
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.urls import reverse
+
+from core.asgi import ConcurrentWsgiToAsgi
+from posts.models import Post
+
+
+def slow_application(application, delay):
+    """WSGI-приложение, в котором каждый SQL-запрос ждет еще delay
+    секунд: замена сетевой базы или медленного диска.
+    """
+    def wait(execute, sql, params, many, context):
+        time.sleep(delay)
+        return execute(sql, params, many, context)
+
+    def wrapped(environ, start_response):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(wait))
+            return application(environ, start_response)
+    return wrapped
+
+
+def read_paths(count):
+    """Адреса страниц чтения: лента, посты и профили их авторов."""
+    posts = list(Post.objects.select_related('author').order_by(
+        '-pub_date')[:count])
+    paths = [reverse('posts:index_posts')]
+    for post in posts:
+        paths.append(reverse('posts:post_detail', args=[post.pk]))
+        paths.append(reverse('posts:profile', args=[post.author.username]))
+    return paths
+
+
+def environ(path):
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': settings.ALLOWED_HOSTS[0],
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http',
+        'wsgi.version': (1, 0),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+
+
+def scope(path):
+    return {
+        'type': 'http',
+        'http_version': '1.1',
+        'method': 'GET',
+        'path': path,
+        'query_string': b'',
+        'headers': [(b'host', settings.ALLOWED_HOSTS[0].encode())],
+    }
+
+
+class ConcurrencyBenchmark:
+    """Пропускная способность страниц чтения через WSGI и через
+    ASGI-вход (core.asgi) при одинаковом числе одновременных запросов.
+
+    Каждый SQL-запрос искусственно ждет delay секунд. Вьюхи синхронные,
+    поэтому обе стороны выполняют один и тот же код в стольких же
+    потоках, и разница между ними - цена переходника. Выигрыш ASGI на
+    медленных клиентах (поток не ждет, пока клиент дочитает ответ) здесь
+    не моделируется. Зато видно, что дают одновременные независимые
+    загрузки во вьюхах (READ_CONCURRENCY): замер идет с ними и без них.
+    Кеш страниц для анонимов стоит выключить, иначе до базы дойдут
+    единицы запросов.
+    """
+
+    def __init__(self, paths, delay=0.02):
+        self.paths = paths
+        self.application = slow_application(get_wsgi_application(), delay)
+
+    def requests(self, count):
+        return [self.paths[i % len(self.paths)] for i in range(count)]
+
+    def wsgi(self, requests, concurrency=8):
+        statuses = []
+
+        def call(path):
+            def start_response(status, headers, exc_info=None):
+                statuses.append(int(status.split(' ', 1)[0]))
+            chunks = self.application(environ(path), start_response)
+            b''.join(chunks)
+            chunks.close()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            list(executor.map(call, self.requests(requests)))
+        return self.result(statuses, time.perf_counter() - start)
+
+    def asgi(self, requests, concurrency=8):
+        application = ConcurrentWsgiToAsgi(self.application)
+        statuses = []
+
+        async def call(path, semaphore):
+            async def receive():
+                return {'type': 'http.request', 'body': b''}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+
+            async with semaphore:
+                await application(scope(path), receive, send)
+
+        async def run():
+            semaphore = asyncio.Semaphore(concurrency)
+            await asyncio.gather(*(
+                call(path, semaphore) for path in self.requests(requests)))
+
+        start = time.perf_counter()
+        asyncio.run(run())
+        return self.result(statuses, time.perf_counter() - start)
+
+    def result(self, statuses, wall):
+        return {
+            'requests': len(statuses),
+            'errors': sum(status != 200 for status in statuses),
+            'throughput_rps': len(statuses) / wall,
+        }
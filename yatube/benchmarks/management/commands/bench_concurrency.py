@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from benchmarks.concurrency import ConcurrencyBenchmark, read_paths
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность страниц чтения через WSGI и '
+        'через ASGI-вход при одинаковом числе одновременных запросов, '
+        'когда каждый SQL-запрос медленный (--delay-ms), с одновременными '
+        'независимыми загрузками во вьюхах и без них. Кеш страниц для '
+        'анонимов выключается.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--delay-ms', type=float, default=20)
+        parser.add_argument(
+            '--concurrency', type=int, default=8,
+            help='Одновременных запросов, и к WSGI, и к ASGI.')
+        parser.add_argument('--posts', type=int, default=20)
+
+    def handle(self, *args, **options):
+        paths = read_paths(options['posts'])
+        if len(paths) < 2:
+            raise CommandError('В базе нет постов, наполните ее bench_seed.')
+        benchmark = ConcurrencyBenchmark(
+            paths, delay=options['delay_ms'] / 1000)
+        results = {}
+        modes = {
+            'по очереди': 0,
+            'одновременно': settings.READ_CONCURRENCY or 4,
+        }
+        for mode, read_concurrency in modes.items():
+            with override_settings(PAGE_CACHE_TIMEOUT=0,
+                                   READ_CONCURRENCY=read_concurrency):
+                for name in ('wsgi', 'asgi'):
+                    run = getattr(benchmark, name)
+                    results[f'{name}, загрузки {mode}'] = run(
+                        options['requests'], options['concurrency'])
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name}: {result["throughput_rps"]:.0f} rps, '
+                f'запросов {result["requests"]}, '
+                f'ошибок {result["errors"]}'
+            )
@@ -0,0 +1,60 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.runner import SCENARIOS, Runner, compare, environment
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку (p50/p95/p99), число SQL-запросов и пропускную '
+        'способность вьюх на текущей базе. Пишет результат в JSON и '
+        'сравнивает его с прошлым прогоном. Сценарии записи оставляют '
+        'в базе новые посты и комментарии.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument(
+            '--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS)
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--output', help='Куда записать результат.')
+        parser.add_argument(
+            '--compare', help='Результат прошлого прогона для сравнения.')
+        parser.add_argument(
+            '--threshold', type=float, default=0.1,
+            help='Допустимое ухудшение метрики, доля.')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('Нужен хотя бы один запрос на сценарий.')
+        runner = Runner(seed=options['seed'])
+        result = {'environment': environment(), 'scenarios': {}}
+        for name in options['scenarios']:
+            if not runner.available(name):
+                self.stdout.write(self.style.WARNING(
+                    f'{name}: нет данных, сценарий пропущен.'))
+                continue
+            metrics = runner.run(name, options['requests'], options['warmup'])
+            result['scenarios'][name] = metrics
+            self.stdout.write(
+                f'{name}: p50 {metrics["p50_ms"]:.1f} мс, '
+                f'p95 {metrics["p95_ms"]:.1f} мс, '
+                f'p99 {metrics["p99_ms"]:.1f} мс, '
+                f'{metrics["queries_mean"]:.1f} запросов, '
+                f'{metrics["throughput_rps"]:.0f} rps, '
+                f'ошибок {metrics["errors"]}'
+            )
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(result, output, indent=2, ensure_ascii=False)
+        if options['compare']:
+            with open(options['compare']) as baseline:
+                lines, regressions = compare(
+                    json.load(baseline), result, options['threshold'])
+            for line in lines:
+                self.stdout.write(line)
+            if regressions:
+                raise CommandError(
+                    'Регрессии:\n' + '\n'.join(regressions))
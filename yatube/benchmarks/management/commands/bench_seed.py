@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from benchmarks.seed import Seeder
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу синтетическими данными для замеров. Объем '
+        'задается параметрами, например --users 100000 --posts 1000000 '
+        '--follows 5000000. Запускать на отдельной базе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--follows', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        seeder = Seeder(
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            log=self.stdout.write,
+        )
+        seeder.seed(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            follows=options['follows'],
+            comments=options['comments'],
+        )
+        self.stdout.write(self.style.SUCCESS('База наполнена.'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.rendering import FEED_TEMPLATES, TemplateBenchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет отрисовку шаблонов лент на постах в памяти: время '
+        'страницы и цену одного поста. База не нужна.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--uncached', action='store_true',
+            help='Без загрузчика cached, как в профиле dev.')
+
+    def handle(self, *args, **options):
+        if options['posts'] < 2:
+            raise CommandError('Нужно хотя бы два поста.')
+        benchmark = TemplateBenchmark(cached=not options['uncached'])
+        for name in FEED_TEMPLATES:
+            result = benchmark.run(
+                name, options['posts'], options['repeat'])
+            self.stdout.write(
+                f'{name}: страница {result["page_ms"]:.2f} мс, '
+                f'{result["per_post_us"]:.0f} мкс на пост'
+            )
@@ -0,0 +1,135 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import override_settings
+from django.test.client import Client, ClientHandler
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import User
+
+BOUNDARY = 'BenchUploadBoundary'
+CLEAR_REFS = '/proc/self/clear_refs'
+
+
+def read_status(field):
+    """Значение поля /proc/self/status в килобайтах."""
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith(f'{field}:'):
+                return int(line.split()[1])
+    raise CommandError(f'В /proc/self/status нет поля {field}.')
+
+
+def reset_peak_rss():
+    with open(CLEAR_REFS, 'w') as clear_refs:
+        clear_refs.write('5')
+
+
+def make_image(path, width, height):
+    # Шум плохо сжимается, размер файла близок к реальным фотографиям.
+    Image.effect_noise((width, height), 64).convert('RGB').save(
+        path, 'JPEG', quality=90)
+
+
+def write_body(path, image_path):
+    """Тело multipart-запроса пишется на диск, а не собирается в памяти,
+    чтобы замер видел только память, которую тратит сервер.
+    """
+    with open(path, 'wb') as body:
+        body.write(
+            f'--{BOUNDARY}\r\n'
+            'Content-Disposition: form-data; name="text"\r\n\r\n'
+            'Замер загрузки\r\n'
+            f'--{BOUNDARY}\r\n'
+            'Content-Disposition: form-data; name="image"; '
+            'filename="bench.jpg"\r\n'
+            'Content-Type: image/jpeg\r\n\r\n'.encode()
+        )
+        with open(image_path, 'rb') as image:
+            shutil.copyfileobj(image, body)
+        body.write(f'\r\n--{BOUNDARY}--\r\n'.encode())
+    return os.path.getsize(path)
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает картинки разного размера через post_create и печатает '
+        'по строке JSON на загрузку: размер, код ответа и пиковый прирост '
+        'RSS процесса. Работает только в Linux. Данные откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+',
+            default=['1024x768', '4000x3000', '5000x5000', '8000x6000'],
+            help='Размеры картинок, ШИРИНАxВЫСОТА.')
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        if not os.path.exists(CLEAR_REFS):
+            raise CommandError('Для замера RSS нужен /proc, то есть Linux.')
+        workdir = tempfile.mkdtemp()
+        try:
+            with override_settings(MEDIA_ROOT=workdir), \
+                    transaction.atomic():
+                self.run(workdir, options['sizes'], options['repeat'])
+                transaction.set_rollback(True)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def run(self, workdir, sizes, repeat):
+        client = Client()
+        client.force_login(
+            User.objects.create_user(username=f'bench-{uuid.uuid4().hex}'))
+        cookies = '; '.join(
+            f'{name}={morsel.value}'
+            for name, morsel in client.cookies.items()
+        )
+        handler = ClientHandler(enforce_csrf_checks=False)
+        for size in sizes:
+            width, height = map(int, size.split('x'))
+            image_path = os.path.join(workdir, f'{size}.jpg')
+            body_path = os.path.join(workdir, f'{size}.body')
+            make_image(image_path, width, height)
+            length = write_body(body_path, image_path)
+            for _ in range(repeat):
+                with open(body_path, 'rb') as body:
+                    reset_peak_rss()
+                    before = read_status('VmRSS')
+                    response = handler(self.environ(body, length, cookies))
+                    peak = read_status('VmHWM') - before
+                self.stdout.write(json.dumps({
+                    'size': size,
+                    'bytes': os.path.getsize(image_path),
+                    'status': response.status_code,
+                    'accepted': response.status_code == 302,
+                    'peak_rss_kb': peak,
+                }))
+
+    def environ(self, body, length, cookies):
+        return {
+            'REQUEST_METHOD': 'POST',
+            'PATH_INFO': reverse('posts:post_create'),
+            'QUERY_STRING': '',
+            'CONTENT_TYPE': f'multipart/form-data; boundary={BOUNDARY}',
+            'CONTENT_LENGTH': str(length),
+            'HTTP_COOKIE': cookies,
+            'SERVER_NAME': settings.ALLOWED_HOSTS[0],
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.url_scheme': 'http',
+            'wsgi.version': (1, 0),
+            'wsgi.multithread': False,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
@@ -0,0 +1,100 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.paginator import Paginator
+from django.template import Engine, RequestContext
+from django.template.backends.django import get_installed_libraries
+from django.test import RequestFactory
+from django.utils import timezone
+
+from posts.models import Group, Post, User, UserStats
+
+# Лента -> шаблон и контекст, которого он ждет, кроме page_obj.
+FEED_TEMPLATES = {
+    'index': ('posts/index.html', {}),
+    'group_posts': ('posts/group_list.html', {'group': 'group'}),
+    'profile': ('posts/profile.html', {'author': 'author', 'post_count': 1}),
+    'follow_index': ('posts/follow.html', {}),
+    'search': ('posts/search.html', {'query': 'запрос'}),
+}
+BASE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def make_engine(cached=True):
+    """Движок с настройками проекта и явно выбранным загрузчиком."""
+    options = settings.TEMPLATES[0]
+    loaders = BASE_LOADERS
+    if cached:
+        loaders = [('django.template.loaders.cached.Loader', BASE_LOADERS)]
+    return Engine(
+        dirs=options['DIRS'],
+        loaders=loaders,
+        context_processors=options['OPTIONS']['context_processors'],
+        libraries=get_installed_libraries(),
+    )
+
+
+def fake_posts(count):
+    """Посты в памяти, без базы: замеряется только отрисовка."""
+    author = User(pk=1, username='author', first_name='Лев',
+                  last_name='Толстой')
+    group = Group(pk=1, slug='group', title='Группа')
+    now = timezone.now()
+    return [
+        Post(pk=i, author=author, group=group, pub_date=now,
+             text='Текст поста. ' * 20)
+        for i in range(1, count + 1)
+    ]
+
+
+class TemplateBenchmark:
+    """Замеряет отрисовку шаблонов лент: время страницы и цену одного
+    поста, которая считается по разнице между страницами из posts и из
+    одного поста.
+    """
+
+    def __init__(self, cached=True):
+        self.engine = make_engine(cached)
+        self.request = RequestFactory().get('/')
+        self.request.user = AnonymousUser()
+        author = User(pk=1, username='author')
+        author.stats = UserStats(user=author)
+        objects = {'group': Group(pk=1, slug='group', title='Группа'),
+                   'author': author}
+        self.extra = {
+            name: {key: objects.get(value, value)
+                   for key, value in context.items()}
+            for name, (_, context) in FEED_TEMPLATES.items()
+        }
+
+    def render(self, name, posts):
+        template_name, _ = FEED_TEMPLATES[name]
+        page_obj = Paginator(posts, max(len(posts), 1)).page(1)
+        context = {
+            'page_obj': page_obj,
+            # Кеш фрагмента с нулевым сроком не отдает готовый HTML.
+            'feed_timeout': 0,
+            'feed_key': name,
+            **self.extra[name],
+        }
+        template = self.engine.get_template(template_name)
+        return template.render(RequestContext(self.request, context))
+
+    def timed(self, name, posts, repeat):
+        self.render(name, posts)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            self.render(name, posts)
+        return (time.perf_counter() - start) / repeat
+
+    def run(self, name, posts=100, repeat=20):
+        many = self.timed(name, fake_posts(posts), repeat)
+        one = self.timed(name, fake_posts(1), repeat)
+        return {
+            'page_ms': one * 1000,
+            'per_post_us': (many - one) / (posts - 1) * 1_000_000,
+        }
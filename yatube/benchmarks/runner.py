@@ -0,0 +1,200 @@
+import math
+import platform
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+import django
+from django.db import connection, connections
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Group, Post, User
+
+SCENARIOS = (
+    'index', 'group_posts', 'profile', 'post_detail', 'follow_index',
+    'post_create', 'add_comment',
+)
+SAMPLE_SIZE = 1000
+CLIENTS = 20
+
+
+class QueryCounter:
+    """Обертка execute, которая считает SQL-запросы.
+
+    В отличие от CaptureQueriesContext видит и запросы из потоков пула
+    core.concurrency.gather: он переносит обертки соединений туда.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+def percentile(values, fraction):
+    """Перцентиль по ближайшему рангу для отсортированного списка."""
+    if not values:
+        return None
+    rank = max(math.ceil(fraction * len(values)), 1)
+    return values[rank - 1]
+
+
+def sample(queryset, size, rng):
+    pks = list(queryset.order_by().values_list('pk', flat=True)[:size * 10])
+    return rng.sample(pks, min(size, len(pks)))
+
+
+class Runner:
+    """Гоняет запросы к вьюхам через тестовый клиент Django и собирает
+    задержки и число SQL-запросов на запрос.
+    """
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.group_slugs = list(Group.objects.values_list(
+            'slug', flat=True)[:SAMPLE_SIZE])
+        self.usernames = list(User.objects.filter(
+            pk__in=sample(User.objects.all(), SAMPLE_SIZE, self.rng),
+        ).values_list('username', flat=True))
+        self.post_pks = sample(Post.objects.all(), SAMPLE_SIZE, self.rng)
+        # Ленту подписок смотрят те, у кого есть подписки.
+        followers = User.objects.filter(stats__following_count__gt=0)
+        if not followers.exists():
+            followers = User.objects.all()
+        self.clients = [
+            self.client(user_id)
+            for user_id in sample(followers, CLIENTS, self.rng)
+        ]
+
+    def client(self, user_id):
+        client = Client()
+        client.force_login(User.objects.get(pk=user_id))
+        return client
+
+    def pick(self, values):
+        return self.rng.choice(values) if values else None
+
+    def index_request(self):
+        return 'get', reverse('posts:index_posts'), None
+
+    def group_posts_request(self):
+        slug = self.pick(self.group_slugs)
+        return 'get', reverse('posts:group', args=[slug]), None
+
+    def profile_request(self):
+        username = self.pick(self.usernames)
+        return 'get', reverse('posts:profile', args=[username]), None
+
+    def post_detail_request(self):
+        post_pk = self.pick(self.post_pks)
+        return 'get', reverse('posts:post_detail', args=[post_pk]), None
+
+    def follow_index_request(self):
+        return 'get', reverse('posts:follow_index'), None
+
+    def post_create_request(self):
+        return 'post', reverse('posts:post_create'), {'text': self.text()}
+
+    def add_comment_request(self):
+        post_pk = self.pick(self.post_pks)
+        return 'post', reverse('posts:add_comment', args=[post_pk]), {
+            'text': self.text()}
+
+    def text(self):
+        return f'Замер {timezone.now().isoformat()}'
+
+    def available(self, name):
+        needs = {
+            'group_posts': self.group_slugs,
+            'profile': self.usernames,
+            'post_detail': self.post_pks,
+            'add_comment': self.post_pks,
+        }
+        return bool(self.clients) and bool(needs.get(name, True))
+
+    def measure(self, name):
+        method, url, data = getattr(self, f'{name}_request')()
+        client = self.pick(self.clients)
+        queries = QueryCounter()
+        with ExitStack() as stack:
+            for alias_connection in connections.all():
+                stack.enter_context(
+                    alias_connection.execute_wrapper(queries))
+            start = time.perf_counter()
+            response = getattr(client, method)(url, data)
+            elapsed = time.perf_counter() - start
+        return elapsed, queries.count, response.status_code in (200, 302)
+
+    def run(self, name, requests, warmup=0):
+        for _ in range(warmup):
+            self.measure(name)
+        timings, query_counts, errors = [], [], 0
+        start = time.perf_counter()
+        for _ in range(requests):
+            elapsed, query_count, ok = self.measure(name)
+            timings.append(elapsed)
+            query_counts.append(query_count)
+            errors += not ok
+        wall = time.perf_counter() - start
+        timings.sort()
+        return {
+            'requests': requests,
+            'errors': errors,
+            'p50_ms': percentile(timings, 0.50) * 1000,
+            'p95_ms': percentile(timings, 0.95) * 1000,
+            'p99_ms': percentile(timings, 0.99) * 1000,
+            'mean_ms': sum(timings) / requests * 1000,
+            'queries_mean': sum(query_counts) / requests,
+            'queries_max': max(query_counts),
+            'throughput_rps': requests / wall,
+        }
+
+
+def environment():
+    return {
+        'created': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'dataset': {
+            'users': User.objects.count(),
+            'groups': Group.objects.count(),
+            'posts': Post.objects.count(),
+        },
+    }
+
+
+# Метрики, рост которых - регрессия, и обратные им.
+HIGHER_IS_WORSE = ('p50_ms', 'p95_ms', 'p99_ms', 'queries_mean')
+LOWER_IS_WORSE = ('throughput_rps',)
+
+
+def compare(baseline, current, threshold):
+    """Сравнивает два прогона, возвращает строки отчета и регрессии."""
+    lines, regressions = [], []
+    for name, metrics in current['scenarios'].items():
+        old = baseline['scenarios'].get(name)
+        if old is None:
+            continue
+        for metric in HIGHER_IS_WORSE + LOWER_IS_WORSE:
+            before, after = old[metric], metrics[metric]
+            change = (after - before) / before if before else 0.0
+            worse = (
+                change > threshold if metric in HIGHER_IS_WORSE
+                else change < -threshold
+            )
+            line = (
+                f'{name} {metric}: {before:.2f} -> {after:.2f} '
+                f'({change:+.1%})'
+            )
+            lines.append(line)
+            if worse:
+                regressions.append(line)
+    return lines, regressions
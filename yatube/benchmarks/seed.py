@@ -0,0 +1,135 @@
+import random
+import uuid
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+from mixer.backend.django import mixer
+
+from posts.bulk import chunks, explicit_dates
+from posts.counters import recount_groups, recount_posts, recount_users
+from posts.models import Comment, Follow, Group, Post, User
+from posts.timeline import rebuild
+
+TEXT_POOL_SIZE = 5000
+DATE_SPAN = timedelta(days=365)
+
+
+def max_pk(model):
+    return model.objects.aggregate(pk=Max('pk'))['pk'] or 0
+
+
+def new_pks(model, after):
+    # bulk_create в SQLite не возвращает id созданных строк.
+    return list(model.objects.filter(pk__gt=after).order_by().values_list(
+        'pk', flat=True))
+
+
+class Seeder:
+    """Наполняет базу синтетическими пользователями, группами, постами,
+    подписками и комментариями.
+
+    Строки пишутся через bulk_create, сигналы не срабатывают, поэтому
+    счетчики и ленты подписок в конце пересчитываются целиком.
+    """
+
+    def __init__(self, batch_size=5000, seed=None, log=None):
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.faker = Faker('ru_RU')
+        self.faker.seed_instance(seed)
+        self.log = log or (lambda message: None)
+        self.tag = uuid.UUID(int=self.random.getrandbits(128)).hex[:8]
+        self.texts = [
+            self.faker.text(max_nb_chars=300)
+            for _ in range(TEXT_POOL_SIZE)
+        ]
+        self.now = timezone.now()
+
+    def text(self):
+        return self.random.choice(self.texts)
+
+    def date(self):
+        return self.now - DATE_SPAN * self.random.random()
+
+    def bulk(self, model, objects, pks=False):
+        """Создает объекты пачками и возвращает их число, а с pks=True -
+        список их id.
+
+        Миллион постов разом не влезет в память. По той же причине id
+        читаются только для моделей, на которые ссылаются следующие.
+        """
+        after = max_pk(model) if pks else None
+        created = 0
+        for chunk in chunks(objects, self.batch_size):
+            model.objects.bulk_create(chunk)
+            created += len(chunk)
+        self.log(f'{model.__name__}: {created}')
+        return new_pks(model, after) if pks else created
+
+    def users(self, count):
+        return self.bulk(User, (
+            User(username=f'bench-{self.tag}-{i}', password='!')
+            for i in range(count)
+        ), pks=True)
+
+    def groups(self, count):
+        after = max_pk(Group)
+        if count:
+            mixer.cycle(count).blend(
+                Group, slug=mixer.sequence(f'bench-{self.tag}-{{0}}'))
+        return new_pks(Group, after)
+
+    def posts(self, count, user_pks, group_pks):
+        group_choices = group_pks + [None] * len(group_pks)
+        return self.bulk(Post, (
+            Post(
+                author_id=self.random.choice(user_pks),
+                group_id=self.random.choice(group_choices or [None]),
+                text=self.text(),
+                pub_date=self.date(),
+            )
+            for _ in range(count)
+        ), pks=True)
+
+    def follows(self, count, user_pks):
+        per_user, extra = divmod(count, len(user_pks))
+        per_user = min(per_user, len(user_pks) - 1)
+
+        def pairs():
+            for i, user_pk in enumerate(user_pks):
+                wanted = per_user + (i < extra)
+                sample = self.random.sample(
+                    user_pks, min(wanted + 1, len(user_pks)))
+                authors = [pk for pk in sample if pk != user_pk]
+                for author_pk in authors[:wanted]:
+                    yield Follow(user_id=user_pk, author_id=author_pk)
+
+        return self.bulk(Follow, pairs())
+
+    def comments(self, count, user_pks, post_pks):
+        return self.bulk(Comment, (
+            Comment(
+                post_id=self.random.choice(post_pks),
+                author_id=self.random.choice(user_pks),
+                text=self.text(),
+                created=self.date(),
+            )
+            for _ in range(count)
+        ))
+
+    @transaction.atomic
+    def seed(self, users, posts, follows, groups=0, comments=0):
+        user_pks = self.users(users)
+        group_pks = self.groups(groups)
+        with explicit_dates(Post._meta.get_field('pub_date'),
+                            Comment._meta.get_field('created')):
+            post_pks = self.posts(posts, user_pks, group_pks)
+            self.follows(follows, user_pks)
+            self.comments(comments if post_pks else 0, user_pks, post_pks)
+        recount_users()
+        recount_groups()
+        recount_posts()
+        self.log(f'Записей в лентах: {rebuild()}')
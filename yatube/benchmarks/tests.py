@@ -0,0 +1,104 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+from benchmarks.rendering import FEED_TEMPLATES
+from benchmarks.runner import SCENARIOS, QueryCounter, Runner, compare
+from benchmarks.seed import Seeder
+from core.concurrency import gather
+from posts.models import Follow, Post, TimelineEntry, User
+
+
+class BenchmarkTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Seeder(seed=1).seed(
+            users=10, groups=2, posts=30, follows=20, comments=10)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_seed_builds_dataset(self):
+        """Наполнение создает данные, счетчики и ленты подписок."""
+        self.assertEqual(User.objects.count(), 10)
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertEqual(Follow.objects.count(), 20)
+        self.assertEqual(
+            Post.objects.order_by().values('pub_date').distinct().count(), 30)
+        self.assertTrue(TimelineEntry.objects.exists())
+        author = Post.objects.first().author
+        self.assertEqual(
+            author.stats.posts_count, author.posts.count())
+
+    def test_seed_reads_pks_only_when_needed(self):
+        """id отдаются для пользователей, для подписок - только число."""
+        seeder = Seeder(seed=2)
+        user_pks = seeder.users(3)
+        self.assertEqual(len(user_pks), 3)
+        self.assertEqual(seeder.follows(4, user_pks), 4)
+
+    def test_runner_measures_scenarios(self):
+        """Каждый сценарий выполняется без ошибок и дает метрики."""
+        runner = Runner(seed=1)
+        for name in SCENARIOS:
+            with self.subTest(name=name):
+                metrics = runner.run(name, requests=3)
+                self.assertEqual(metrics['errors'], 0)
+                self.assertLessEqual(metrics['p50_ms'], metrics['p99_ms'])
+                self.assertGreater(metrics['queries_max'], 0)
+
+    def test_compare_reports_regressions(self):
+        """Сравнение находит метрики, ухудшившиеся сильнее порога."""
+        metrics = {
+            'p50_ms': 10.0, 'p95_ms': 20.0, 'p99_ms': 30.0,
+            'queries_mean': 3.0, 'throughput_rps': 100.0,
+        }
+        baseline = {'scenarios': {'index': metrics}}
+        current = {'scenarios': {'index': {**metrics, 'p95_ms': 30.0}}}
+        _, regressions = compare(baseline, current, threshold=0.1)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('p95_ms', regressions[0])
+
+
+class QueryCounterTests(SimpleTestCase):
+    databases = {'default'}
+
+    def test_counts_queries_in_pool_threads(self):
+        """Счетчик видит и запросы загрузок из потоков пула gather."""
+        def load():
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries):
+            gather(load, load)
+        self.assertEqual(queries.count, 2)
+
+
+class BenchTemplatesCommandTests(TestCase):
+    def test_reports_every_feed(self):
+        """Замер отрисовки выводит цену поста для каждой ленты."""
+        out = StringIO()
+        call_command('bench_templates', '--posts', '3', '--repeat', '1',
+                     stdout=out)
+        for name in FEED_TEMPLATES:
+            self.assertIn(f'{name}: страница', out.getvalue())
+
+
+class BenchConcurrencyCommandTests(TransactionTestCase):
+    def test_compares_wsgi_and_asgi(self):
+        """Замер прогоняет страницы через WSGI и ASGI, с одновременными
+        загрузками и без них, без ошибок.
+        """
+        Seeder(seed=1).seed(users=3, posts=5, follows=2)
+        out = StringIO()
+        call_command('bench_concurrency', '--requests', '6', '--posts', '2',
+                     '--delay-ms', '0', stdout=out)
+        for name in ('wsgi', 'asgi'):
+            self.assertIn(f'{name}, загрузки по очереди:', out.getvalue())
+            self.assertIn(f'{name}, загрузки одновременно:', out.getvalue())
+        self.assertEqual(out.getvalue().count('ошибок 0'), 4)
@@ -1,5 +1,10 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from .checks import atomic_cache_check
+        checks.register(atomic_cache_check, checks.Tags.caches)
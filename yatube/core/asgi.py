@@ -0,0 +1,17 @@
+from asgiref.sync import ThreadSensitiveContext
+from asgiref.wsgi import WsgiToAsgi
+
+
+class ConcurrentWsgiToAsgi(WsgiToAsgi):
+    """asgiref.wsgi.WsgiToAsgi, в котором каждый запрос выполняется в
+    своем потоке.
+
+    Без контекста asgiref выполняет все синхронные вызовы в одном общем
+    потоке, и запросы шли бы строго по одному. Django 3.2+ в своем
+    ASGIHandler делает так же. Сколько запросов выполняется одновременно,
+    ограничивает сервер, например uvicorn --limit-concurrency.
+    """
+
+    async def __call__(self, scope, receive, send):
+        async with ThreadSensitiveContext():
+            await super().__call__(scope, receive, send)
@@ -0,0 +1,25 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite с PRAGMA из OPTIONS['pragmas'] и транзакциями BEGIN IMMEDIATE.
+
+    Обычный BEGIN откладывает блокировку на запись до первой записи. Если
+    за это время пишет другое соединение, SQLite сразу отвечает
+    "database is locked", не дожидаясь busy_timeout. IMMEDIATE берет
+    блокировку в начале транзакции, и писатели ждут друг друга в очереди.
+    """
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = params.pop('pragmas', {})
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
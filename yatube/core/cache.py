@@ -0,0 +1,141 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+MISSING = object()
+
+# Локальный уровень общий для всех потоков процесса, как у LocMemCache.
+_local_tiers = {}
+_locks = {}
+
+
+class TwoTierCache(BaseCache):
+    """Маленький LRU в памяти процесса перед общим кешем.
+
+    LOCATION - алиас общего кеша в settings.CACHES. Запись попадает в
+    локальный уровень не дольше, чем на LOCAL_TIMEOUT секунд, поэтому
+    изменение, сделанное другим процессом, видно не позже этого срока.
+    Ключи с префиксами из SHARED_ONLY_PREFIXES (счетчики версий) всегда
+    читаются из общего кеша и видны всем процессам сразу.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = location
+        self.local_max_entries = options.get('LOCAL_MAX_ENTRIES', 500)
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.shared_only = tuple(options.get('SHARED_ONLY_PREFIXES', ()))
+        self._local = _local_tiers.setdefault(location, OrderedDict())
+        self._lock = _locks.setdefault(location, threading.Lock())
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def _local_key(self, key, version):
+        return self.make_key(key, version=version)
+
+    def _is_local(self, key):
+        return not key.startswith(self.shared_only)
+
+    def _local_get(self, key, version):
+        local_key = self._local_key(key, version)
+        with self._lock:
+            value, expires = self._local.get(local_key, (MISSING, 0))
+            if value is MISSING:
+                return MISSING
+            if expires < time.monotonic():
+                del self._local[local_key]
+                return MISSING
+            self._local.move_to_end(local_key)
+        return pickle.loads(value)
+
+    def _local_set(self, key, value, version, timeout=DEFAULT_TIMEOUT):
+        if not self._is_local(key):
+            return
+        if timeout in (DEFAULT_TIMEOUT, None):
+            timeout = self.local_timeout
+        timeout = min(timeout, self.local_timeout)
+        local_key = self._local_key(key, version)
+        # Как и LocMemCache, храним копию в pickle: иначе вызывающий код
+        # менял бы объект, который потом получат другие запросы.
+        value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._local[local_key] = (value, time.monotonic() + timeout)
+            self._local.move_to_end(local_key)
+            while len(self._local) > self.local_max_entries:
+                self._local.popitem(last=False)
+
+    def _local_delete(self, key, version):
+        with self._lock:
+            self._local.pop(self._local_key(key, version), None)
+
+    def get(self, key, default=None, version=None):
+        if self._is_local(key):
+            value = self._local_get(key, version)
+            if value is not MISSING:
+                return value
+        value = self.shared.get(key, MISSING, version=version)
+        if value is MISSING:
+            return default
+        self._local_set(key, value, version)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        missing = []
+        for key in keys:
+            value = (
+                self._local_get(key, version) if self._is_local(key)
+                else MISSING
+            )
+            if value is MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            shared = self.shared.get_many(missing, version=version)
+            for key, value in shared.items():
+                self._local_set(key, value, version)
+            found.update(shared)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        self._local_set(key, value, version, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self._local_set(key, value, version, timeout)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self._local_delete(key, version)
+        self.shared.delete(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self._local_delete(key, version)
+        return self.shared.incr(key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        return self.incr(key, -delta, version=version)
+
+    def has_key(self, key, version=None):
+        return self.get(key, MISSING, version=version) is not MISSING
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
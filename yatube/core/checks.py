@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.checks import Warning
+
+# Кеши, в которых incr - это get и set, а add - has_key и set.
+NON_ATOMIC_BACKENDS = (
+    'django.core.cache.backends.filebased.FileBasedCache',
+    'django.core.cache.backends.db.DatabaseCache',
+)
+# Обертки, которые передают incr и add кешу с алиасом из LOCATION.
+WRAPPER_BACKENDS = (
+    'core.cache.TwoTierCache',
+    'core.instrumentation.MeasuredCache',
+)
+
+
+def cache_backend(alias='default'):
+    config = settings.CACHES[alias]
+    while config['BACKEND'] in WRAPPER_BACKENDS:
+        config = settings.CACHES[config['LOCATION']]
+    return config['BACKEND']
+
+
+def atomic_cache_check(app_configs, **kwargs):
+    """Лимиты частоты и блокировка перерисовки кеша страниц полагаются
+    на атомарные incr и add общего кеша.
+    """
+    users = []
+    if settings.RATE_LIMIT_ENABLED:
+        users.append('RATE_LIMIT_ENABLED')
+    if settings.PAGE_CACHE_TIMEOUT:
+        users.append('PAGE_CACHE_TIMEOUT')
+    backend = cache_backend()
+    if not users or backend not in NON_ATOMIC_BACKENDS:
+        return []
+    return [Warning(
+        f'{backend} не атомарно выполняет incr и add.',
+        hint=(
+            f'С {" и ".join(users)} параллельные воркеры теряют запросы в '
+            'счетчиках лимитов и перерисовывают одну страницу несколько '
+            'раз. Для нескольких воркеров выберите CACHE_BACKEND '
+            'memcached или redis.'
+        ),
+        id='core.W001',
+    )]
@@ -0,0 +1,222 @@
+import heapq
+import json
+import logging
+import random
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+logger = logging.getLogger('yatube.requests')
+
+# Метрики запроса, который сейчас замеряется в этом потоке или задаче.
+current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self, slow_queries=3):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.slowest = []
+        self.slow_queries = slow_queries
+        self.timings = defaultdict(float)
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def execute(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = perf_counter() - start
+            self.queries += 1
+            self.sql_time += duration
+            push = (
+                heapq.heappush if len(self.slowest) < self.slow_queries
+                else heapq.heappushpop
+            )
+            push(self.slowest, (duration, sql))
+
+    def server_timing(self, total):
+        sql = f'{self.queries} queries'
+        cache = f'{self.cache_hits} hits, {self.cache_misses} misses'
+        parts = [
+            f'sql;dur={self.sql_time * 1000:.1f};desc="{sql}"',
+            *(f'{name};dur={duration * 1000:.1f}'
+              for name, duration in self.timings.items()),
+            f'cache;desc="{cache}"',
+            f'total;dur={total * 1000:.1f}',
+        ]
+        return ', '.join(parts)
+
+    def as_dict(self, total):
+        return {
+            'queries': self.queries,
+            'sql_ms': round(self.sql_time * 1000, 1),
+            'slowest': [
+                {'ms': round(duration * 1000, 1), 'sql': sql}
+                for duration, sql in sorted(self.slowest, reverse=True)
+            ],
+            **{f'{name}_ms': round(duration * 1000, 1)
+               for name, duration in self.timings.items()},
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'total_ms': round(total * 1000, 1),
+        }
+
+
+@contextmanager
+def measure(name):
+    """Добавляет время блока к метрикам текущего запроса, если он
+    замеряется.
+    """
+    metrics = current.get()
+    if metrics is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        metrics.timings[name] += perf_counter() - start
+
+
+def count_cache(hits, misses):
+    metrics = current.get()
+    if metrics is not None:
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+
+
+class RequestMetricsMiddleware:
+    """Замеряет долю запросов: SQL, отрисовку шаблонов, кеш и прочие
+    участки, обернутые в measure(). Пишет их в заголовок Server-Timing
+    и строкой JSON в лог yatube.requests.
+
+    Доля задается INSTRUMENTATION_SAMPLE_RATE. При нуле middleware
+    отключается целиком, остальные запросы платят за один random().
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.INSTRUMENTATION_SAMPLE_RATE
+        self.slow_queries = settings.INSTRUMENTATION_SLOW_QUERIES
+        if not self.sample_rate:
+            raise MiddlewareNotUsed
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        metrics = RequestMetrics(self.slow_queries)
+        token = current.set(metrics)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(metrics.execute))
+                start = perf_counter()
+                response = self.get_response(request)
+                total = perf_counter() - start
+        finally:
+            current.reset(token)
+        response['Server-Timing'] = metrics.server_timing(total)
+        resolver_match = getattr(request, 'resolver_match', None)
+        logger.info(json.dumps({
+            'view': resolver_match.view_name if resolver_match else None,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            **metrics.as_dict(total),
+        }, ensure_ascii=False))
+        return response
+
+
+class MeasuredTemplate(Template):
+    def render(self, context=None, request=None):
+        with measure('template'):
+            return super().render(context, request)
+
+
+class MeasuredTemplates(DjangoTemplates):
+    """Движок шаблонов Django, который замеряет время отрисовки.
+
+    Вложенные шаблоны ({% include %}, {% extends %}) отрисовываются
+    внутри внешнего и отдельно не считаются.
+    """
+
+    def from_string(self, template_code):
+        return MeasuredTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return MeasuredTemplate(
+                self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+class MeasuredCache(BaseCache):
+    """Считает попадания и промахи кеша с алиасом LOCATION."""
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.alias = location
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get(self, key, default=None, version=None):
+        value = self.cache.get(key, MISSING, version=version)
+        count_cache(value is not MISSING, value is MISSING)
+        return default if value is MISSING else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = self.cache.get_many(keys, version=version)
+        count_cache(len(found), len(keys) - len(found))
+        return found
+
+    def has_key(self, key, version=None):
+        return self.get(key, MISSING, version=version) is not MISSING
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.cache.set(key, value, timeout, version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.cache.add(key, value, timeout, version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.cache.set_many(data, timeout, version=version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.cache.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.cache.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        self.cache.delete_many(keys, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        return self.cache.incr(key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        return self.cache.decr(key, delta, version=version)
+
+    def clear(self):
+        self.cache.clear()
+
+    def close(self, **kwargs):
+        self.cache.close(**kwargs)
+
+
+MISSING = object()
@@ -0,0 +1,69 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PRIMARY_COOKIE = 'use_primary'
+
+# Маршрут текущего запроса: {'primary': bool, 'wrote': bool}. Вне запроса
+# (команды, пул миниатюр) None, и все идет в основную базу.
+_route = ContextVar('db_route', default=None)
+
+
+class ReplicaRouter:
+    """Отправляет чтения из запросов на реплику DATABASE_REPLICA_ALIAS.
+
+    В основную базу читают запросы, приколотые к ней ReplicaMiddleware,
+    запросы, которые уже что-то записали, и чтения внутри транзакции:
+    читать то, что сейчас будет изменено, с отстающей реплики нельзя.
+    """
+
+    def db_for_read(self, model, **hints):
+        route = _route.get()
+        if (route is None or route['primary'] or route['wrote']
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return settings.DATABASE_REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        route = _route.get()
+        if route is not None:
+            route['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплика - копия основной базы, связи между ними допустимы.
+        return True
+
+
+class ReplicaMiddleware:
+    """Держит запросы пользователя в основной базе, пока реплика может
+    не видеть его записей.
+
+    Небезопасные методы целиком идут в основную базу. После записи
+    клиент получает куку на READ_YOUR_WRITES_SECONDS секунд, и его
+    запросы в это время тоже читают из основной базы.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICA_ALIAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        route = {
+            'primary': (request.method not in ('GET', 'HEAD', 'OPTIONS')
+                        or PRIMARY_COOKIE in request.COOKIES),
+            'wrote': False,
+        }
+        token = _route.set(route)
+        try:
+            response = self.get_response(request)
+        finally:
+            _route.reset(token)
+        if route['wrote']:
+            response.set_cookie(
+                PRIMARY_COOKIE, '1',
+                max_age=settings.READ_YOUR_WRITES_SECONDS, httponly=True)
+        return response
@@ -0,0 +1,476 @@
+import asyncio
+import contextvars
+import importlib
+import json
+import os
+import tempfile
+import threading
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, transaction
+from django.http import HttpResponse
+from django.template import Engine
+from django.template.backends.django import get_installed_libraries
+from django.test import (Client, RequestFactory, SimpleTestCase, TestCase,
+                         TransactionTestCase, override_settings)
+
+from core.asgi import ConcurrentWsgiToAsgi
+from core.checks import atomic_cache_check
+from core.concurrency import gather
+from core.instrumentation import MeasuredCache, RequestMetrics, current
+from core.ratelimit import hit, parse_rate
+from core.replicas import (PRIMARY_COOKIE, ReplicaMiddleware, ReplicaRouter,
+                           _route)
+from core.warmup import warm_templates
+from posts.models import Group, Post, User
+from yatube import asgi
+
+
+class RequestMetricsMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.create(
+            author=cls.user, group=cls.group, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=1)
+    def test_sampled_request_reports_metrics(self):
+        """Замеренный запрос отдает Server-Timing и пишет строку в лог."""
+        with self.assertLogs('yatube.requests', 'INFO') as logs:
+            response = Client().get('/')
+        timing = response['Server-Timing']
+        self.assertIn('sql;dur=', timing)
+        self.assertIn('template;dur=', timing)
+        self.assertIn('total;dur=', timing)
+        self.assertNotIn('SELECT', timing)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'posts:index_posts')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['queries'], 0)
+        self.assertLessEqual(len(record['slowest']), 3)
+        self.assertIn('SELECT', record['slowest'][0]['sql'])
+
+    def test_disabled_by_default(self):
+        """При нулевой доле замеров заголовка нет."""
+        response = Client().get('/')
+        self.assertFalse(response.has_header('Server-Timing'))
+
+
+class MeasuredCacheTests(TestCase):
+    def test_counts_hits_and_misses(self):
+        """Обертка кеша считает попадания и промахи замеряемого запроса."""
+        measured = MeasuredCache('default', {})
+        metrics = RequestMetrics()
+        token = current.set(metrics)
+        try:
+            measured.set('key', 'value')
+            self.assertEqual(measured.get('key'), 'value')
+            self.assertIsNone(measured.get('missing'))
+            self.assertEqual(
+                measured.get_many(['key', 'missing']), {'key': 'value'})
+        finally:
+            current.reset(token)
+        self.assertEqual(metrics.cache_hits, 2)
+        self.assertEqual(metrics.cache_misses, 2)
+
+
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch('core.ratelimit.time.time', return_value=600.0)
+        self.clock = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def burst(self, count, ident='user:1'):
+        return [hit('test', ident, 5, 60) for _ in range(count)]
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('10/m'), (10, 60))
+        self.assertEqual(parse_rate('100/hour'), (100, 3600))
+
+    def test_burst_over_limit_is_rejected(self):
+        """Залп сверх лимита отклоняется до конца окна."""
+        self.clock.return_value = 610.0
+        self.assertEqual(self.burst(7), [0] * 5 + [50, 50])
+        self.assertEqual(self.burst(1, ident='user:2'), [0])
+
+    def test_window_boundary_does_not_double_limit(self):
+        """Сразу после смены окна прошлый залп еще учитывается."""
+        self.clock.return_value = 659.0
+        self.burst(5)
+        self.clock.return_value = 661.0
+        self.assertTrue(self.burst(1)[0])
+        self.clock.return_value = 719.0
+        self.assertEqual(self.burst(1), [0])
+
+
+FILE_CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': 'shared',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': tempfile.gettempdir(),
+    },
+}
+
+
+class AtomicCacheCheckTests(SimpleTestCase):
+    def test_atomic_backend_passes(self):
+        """С locmem проверка молчит."""
+        self.assertEqual(atomic_cache_check(None), [])
+
+    @override_settings(CACHES=FILE_CACHES)
+    def test_file_backend_behind_wrapper_warns(self):
+        """Файловый кеш за двухуровневым предупреждает о неатомарном incr."""
+        warnings = atomic_cache_check(None)
+        self.assertEqual([warning.id for warning in warnings], ['core.W001'])
+
+    @override_settings(CACHES=FILE_CACHES, RATE_LIMIT_ENABLED=False,
+                       PAGE_CACHE_TIMEOUT=0)
+    def test_file_backend_without_users(self):
+        """Без лимитов и кеша страниц атомарность не нужна."""
+        self.assertEqual(atomic_cache_check(None), [])
+
+
+@override_settings(DATABASE_REPLICA_ALIAS='replica')
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def view(self, request):
+        db = self.router.db_for_read(Post)
+        if request.GET.get('write'):
+            self.router.db_for_write(Post)
+        return HttpResponse(db)
+
+    def get(self, request):
+        return ReplicaMiddleware(self.view)(request)
+
+    def test_reads_outside_requests_use_primary(self):
+        """Вне запроса чтения идут в основную базу."""
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_reads_go_to_replica(self):
+        """Чтения запроса идут на реплику, пока он ничего не записал."""
+        token = _route.set({'primary': False, 'wrote': False})
+        try:
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+            self.assertEqual(self.router.db_for_write(Post), 'default')
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        finally:
+            _route.reset(token)
+
+    def test_read_your_writes(self):
+        """После записи клиент читает из основной базы."""
+        response = self.get(self.factory.get('/'))
+        self.assertEqual(response.content, b'replica')
+        self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+        response = self.get(self.factory.post('/'))
+        self.assertEqual(response.content, b'default')
+        response = self.get(self.factory.get('/', {'write': 1}))
+        self.assertEqual(
+            response.cookies[PRIMARY_COOKIE]['max-age'],
+            settings.READ_YOUR_WRITES_SECONDS)
+        request = self.factory.get('/')
+        request.COOKIES[PRIMARY_COOKIE] = '1'
+        self.assertEqual(self.get(request).content, b'default')
+
+
+@skipUnless(settings.DATABASE_REPLICA_ALIAS,
+            'реплика не задана, DATABASE_REPLICA_NAME')
+class ReplicaDatabaseTests(TransactionTestCase):
+    """Реплика здесь - отдельная пустая база, которую никто не
+    реплицирует: по тому, что видно, понятно, откуда шло чтение.
+    """
+
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.user = User.objects.create_user(username='auth')
+
+    def test_views_read_from_replica(self):
+        client = Client()
+        url = f'/group/{self.group.slug}/'
+        self.assertEqual(client.get(url).status_code, 404)
+        client.cookies[PRIMARY_COOKIE] = '1'
+        self.assertEqual(client.get(url).status_code, 200)
+
+
+class SqliteConcurrencyTests(SimpleTestCase):
+    """Нагрузочная проверка настроек SQLite на файле во временной папке."""
+
+    alias = 'stress'
+    writers = 4
+    increments = 50
+    readers = 4
+    reads = 200
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        connections.databases[self.alias] = {
+            **settings.DATABASES['default'],
+            'NAME': os.path.join(directory.name, 'stress.sqlite3'),
+            'CONN_MAX_AGE': 0,
+        }
+        self.addCleanup(connections.databases.pop, self.alias)
+        self.errors = []
+        with self.connection().cursor() as cursor:
+            cursor.execute(
+                'CREATE TABLE counter (id INTEGER PRIMARY KEY, '
+                'value INTEGER NOT NULL)')
+            cursor.execute('INSERT INTO counter VALUES (1, 0)')
+
+    def connection(self):
+        connection = connections[self.alias]
+        self.addCleanup(self.close)
+        return connection
+
+    def close(self):
+        # Соединения потока кешируются по алиасу, а база у каждого
+        # теста своя.
+        connections[self.alias].close()
+        del connections[self.alias]
+
+    def run_threads(self, target, count):
+        def run():
+            try:
+                target()
+            except Exception as error:
+                self.errors.append(error)
+            finally:
+                self.close()
+        return [threading.Thread(target=run) for _ in range(count)]
+
+    def write(self):
+        for _ in range(self.increments):
+            # Чтение перед записью в одной транзакции: с обычным BEGIN
+            # такой писатель получает "database is locked" сразу.
+            with transaction.atomic(using=self.alias):
+                with connections[self.alias].cursor() as cursor:
+                    cursor.execute('SELECT value FROM counter WHERE id = 1')
+                    value = cursor.fetchone()[0]
+                    cursor.execute(
+                        'UPDATE counter SET value = %s WHERE id = 1',
+                        [value + 1])
+
+    def read(self):
+        with connections[self.alias].cursor() as cursor:
+            for _ in range(self.reads):
+                cursor.execute('SELECT value FROM counter WHERE id = 1')
+                cursor.fetchone()
+
+    def test_pragmas_applied(self):
+        with self.connection().cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_concurrent_reads_and_writes(self):
+        """Параллельные читатели и писатели не ловят блокировок и не
+        теряют записей.
+        """
+        threads = (self.run_threads(self.write, self.writers)
+                   + self.run_threads(self.read, self.readers))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.errors, [])
+        with self.connection().cursor() as cursor:
+            cursor.execute('SELECT value FROM counter WHERE id = 1')
+            self.assertEqual(
+                cursor.fetchone()[0], self.writers * self.increments)
+
+
+class WarmTemplatesTests(SimpleTestCase):
+    def engine(self, loaders):
+        return Engine(dirs=settings.TEMPLATES[0]['DIRS'], loaders=loaders,
+                      libraries=get_installed_libraries())
+
+    def test_warms_project_templates(self):
+        """Шаблоны проекта разбираются заранее и лежат в кеше загрузчика."""
+        loaders = [('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ])]
+        engine = self.engine(loaders)
+        self.assertGreater(warm_templates(engine), 0)
+        cached = engine.template_loaders[0].get_template_cache
+        self.assertIn('posts/index.html', cached)
+        self.assertNotIn('admin/base.html', cached)
+
+    def test_skipped_without_cached_loader(self):
+        """Без загрузчика cached прогревать нечего."""
+        engine = self.engine(['django.template.loaders.filesystem.Loader'])
+        self.assertEqual(warm_templates(engine), 0)
+
+
+class SettingsProfilesTests(SimpleTestCase):
+    def test_prod_profile(self):
+        """prod без DEBUG, с кешем шаблонов, постоянными соединениями,
+        GZip и ConditionalGet.
+        """
+        with mock.patch.dict(os.environ, {'SECRET_KEY': 'секрет'}):
+            prod = importlib.reload(
+                importlib.import_module('yatube.settings.prod'))
+        self.assertFalse(prod.DEBUG)
+        self.assertEqual(prod.SECRET_KEY, 'секрет')
+        loader, _ = prod.TEMPLATES[0]['OPTIONS']['loaders'][0]
+        self.assertEqual(loader, 'django.template.loaders.cached.Loader')
+        self.assertGreater(prod.DATABASES['default']['CONN_MAX_AGE'], 0)
+        middleware = prod.MIDDLEWARE
+        self.assertLess(
+            middleware.index('django.middleware.gzip.GZipMiddleware'),
+            middleware.index(
+                'django.middleware.http.ConditionalGetMiddleware'),
+        )
+
+    def test_prod_requires_secret_key(self):
+        """prod не запускается с ключом из репозитория."""
+        environ = {k: v for k, v in os.environ.items() if k != 'SECRET_KEY'}
+        with mock.patch.dict(os.environ, environ, clear=True):
+            with self.assertRaises(ImproperlyConfigured):
+                importlib.reload(
+                    importlib.import_module('yatube.settings.prod'))
+
+    def test_dev_profile(self):
+        """dev с DEBUG и без кеша шаблонов."""
+        dev = importlib.import_module('yatube.settings.dev')
+        self.assertTrue(dev.DEBUG)
+        self.assertEqual(
+            dev.TEMPLATES[0]['OPTIONS']['loaders'], dev.TEMPLATE_LOADERS)
+
+
+class ConcurrentWsgiToAsgiTests(SimpleTestCase):
+    def call(self, application, scope, messages):
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(application(scope, receive, send))
+        return sent
+
+    def body(self, sent):
+        return b''.join(message.get('body', b'') for message in sent[1:])
+
+    def scope(self, path, method='GET', query_string=b'', headers=()):
+        return {
+            'type': 'http', 'http_version': '1.1', 'method': method,
+            'path': path, 'query_string': query_string,
+            'headers': list(headers),
+        }
+
+    def test_request_reaches_wsgi_application(self):
+        """Путь, строка запроса, заголовки и тело доходят до WSGI."""
+        def echo(environ, start_response):
+            start_response('201 Created', [])
+            # По PEP 3333 в строках environ лежат байты как latin-1.
+            return [environ['PATH_INFO'].encode('latin1'), b'|',
+                    environ['QUERY_STRING'].encode(), b'|',
+                    environ['HTTP_X_TOKEN'].encode(), b'|',
+                    environ['wsgi.input'].read()]
+
+        sent = self.call(ConcurrentWsgiToAsgi(echo), self.scope(
+            '/посты/', 'POST', b'page=2', [(b'x-token', b'abc')],
+        ), [
+            {'type': 'http.request', 'body': b'one ', 'more_body': True},
+            {'type': 'http.request', 'body': b'two'},
+        ])
+        start, body = sent[0], self.body(sent)
+        self.assertEqual(start['status'], 201)
+        self.assertEqual(body, '/посты/|page=2|abc|one two'.encode())
+
+    def test_requests_run_concurrently(self):
+        """Запросы выполняются одновременно, каждый в своем потоке."""
+        barrier = threading.Barrier(2, timeout=5)
+
+        def wait(environ, start_response):
+            barrier.wait()
+            start_response('200 OK', [])
+            return [threading.current_thread().name.encode()]
+
+        application = ConcurrentWsgiToAsgi(wait)
+        sent = []
+
+        async def call():
+            async def receive():
+                return {'type': 'http.request', 'body': b''}
+
+            async def send(message):
+                sent.append(message)
+
+            await application(self.scope('/'), receive, send)
+
+        async def run():
+            await asyncio.gather(call(), call())
+
+        asyncio.run(run())
+        threads = {message.get('body') for message in sent} - {None, b''}
+        self.assertEqual(len(threads), 2)
+
+    def test_django_page(self):
+        """Страница Django отдается через ASGI-вход."""
+        sent = self.call(asgi.application, self.scope(
+            '/about/author/', headers=[(b'host', b'localhost')],
+        ), [{'type': 'http.request', 'body': b''}])
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn('Об авторе'.encode(), self.body(sent))
+
+
+class GatherTests(SimpleTestCase):
+    def test_loads_run_in_pool_with_context(self):
+        """Загрузки выполняются в пуле с копией контекста, результаты
+        идут по порядку.
+        """
+        variable = contextvars.ContextVar('variable')
+        variable.set('запрос')
+
+        def load():
+            return threading.current_thread().name, variable.get()
+
+        first, second = gather(load, load)
+        self.assertEqual(first, (threading.current_thread().name, 'запрос'))
+        self.assertTrue(second[0].startswith('loads'))
+        self.assertEqual(second[1], 'запрос')
+
+    @override_settings(READ_CONCURRENCY=0)
+    def test_disabled_runs_in_order(self):
+        """При READ_CONCURRENCY = 0 загрузки идут по очереди здесь же."""
+        names = gather(*[lambda: threading.current_thread().name] * 2)
+        self.assertEqual(names, [threading.current_thread().name] * 2)
+
+
+class GatherTransactionTests(TestCase):
+    def test_transaction_runs_in_order(self):
+        """Внутри транзакции загрузки идут в ее потоке: другие соединения
+        не видят ее записей.
+        """
+        user = User.objects.create_user(username='Автор')
+
+        def load():
+            return User.objects.filter(pk=user.pk).exists()
+
+        self.assertEqual(gather(load, load), [True, True])
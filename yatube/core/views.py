@@ -15,3 +15,9 @@ def permission_denied(request, exception):
 
 def server_error(request):
     return render(request, 'core/500.html', status=500)
+
+
+def too_many_requests(request, retry_after):
+    response = render(request, 'core/429.html', status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
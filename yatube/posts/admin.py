@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from .models import Group, Post
+from .search import search_posts
 
 
 @admin.register(Post)
@@ -11,6 +12,13 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск идет по полнотекстовому индексу, а не LIKE по text.
+        if not search_term.strip():
+            return queryset, False
+        found, _ = search_posts(search_term, queryset)
+        return found, False
+
 
 @admin.register(Group)
 class GroupAdmin(admin.ModelAdmin):
@@ -0,0 +1,49 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+def add(queryset, field, delta):
+    """Сдвигает счетчик одним UPDATE, без чтения строки."""
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gt': 0})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def add_user_stat(user_id, field, delta):
+    updated = add(UserStats.objects.filter(user_id=user_id), field, delta)
+    if not updated and delta > 0:
+        # Строки счетчиков нет, например у пользователя, созданного в
+        # обход сигналов: считаем ее с нуля.
+        recount_users(User.objects.filter(pk=user_id))
+
+
+def count_of(model, field, related='pk'):
+    """Подзапрос COUNT(*) по внешнему ключу field модели model."""
+    counts = model.objects.filter(**{field: OuterRef(related)}).order_by(
+    ).values(field).annotate(count=Count('pk')).values('count')
+    return Coalesce(
+        Subquery(counts, output_field=IntegerField()), 0)
+
+
+def recount_users(users=None):
+    users = User.objects.all() if users is None else users
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=pk) for pk in
+         users.filter(stats__isnull=True).values_list('pk', flat=True)],
+        ignore_conflicts=True,
+    )
+    return UserStats.objects.filter(user__in=users).update(
+        posts_count=count_of(Post, 'author', 'user'),
+        followers_count=count_of(Follow, 'author', 'user'),
+        following_count=count_of(Follow, 'user', 'user'),
+    )
+
+
+def recount_groups():
+    return Group.objects.update(posts_count=count_of(Post, 'group'))
+
+
+def recount_posts():
+    return Post.objects.update(comments_count=count_of(Comment, 'post'))
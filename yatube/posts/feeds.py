@@ -0,0 +1,139 @@
+import hashlib
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from .paginator import CursorPaginator, decode_cursor, paginate
+
+POSTS_COUNT = 10
+COMMENTS_COUNT = 20
+FEED_CACHE_TIMEOUT = 60 * 60 * 6
+
+
+def version_key(scope):
+    return ':'.join(['feed-version', *map(str, scope)])
+
+
+def new_version():
+    # Версия, пропавшая из кеша, не должна начаться заново с числа,
+    # под которым уже лежат старые страницы.
+    return time.time_ns()
+
+
+def feed_versions(*scopes):
+    keys = [version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, new_version(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _incr_version(key):
+    try:
+        cache.incr(key)
+        # incr файлового кеша и кеша в базе перезаписывает ключ со сроком
+        # по умолчанию, а версия должна жить не меньше страниц.
+        cache.touch(key, None)
+    except ValueError:
+        cache.set(key, new_version(), None)
+
+
+def bump_version(*scope):
+    """Делает устаревшими все закешированные страницы области.
+
+    Версия сдвигается сразу и еще раз после коммита: страница, которую
+    другой процесс успел закешировать до коммита, не переживет его.
+    """
+    key = version_key(scope)
+    _incr_version(key)
+    transaction.on_commit(partial(_incr_version, key))
+
+
+def bump_post_feeds(post):
+    """Сбрасывает ленты, в которые попадает пост."""
+    bump_version('index')
+    bump_version('post', post.pk)
+    bump_version('profile', post.author_id)
+    if post.group_id is not None:
+        bump_version('group', post.group_id)
+
+
+def page_position(request):
+    cursor = request.GET.get('cursor')
+    if cursor and decode_cursor(cursor):
+        return cursor
+    try:
+        number = max(int(request.GET.get('page')), 1)
+    except (TypeError, ValueError):
+        number = 1
+    return f'page-{number}'
+
+
+def feed_key(request, *scopes):
+    """Ключ страницы ленты: области ленты, их версии и позиция.
+
+    Первая область называет ленту, остальные - от чего она еще зависит.
+    Области и ключ запоминаются в запросе для кеша страниц целиком.
+    """
+    parts = [':'.join(map(str, scope)) for scope in scopes]
+    versions = [f'v{version}' for version in feed_versions(*scopes)]
+    key = ':'.join([*parts, *versions, page_position(request)])
+    request.feed_scopes, request.feed_key = scopes, key
+    return key
+
+
+def page_etag(request, key):
+    """ETag страницы по ее ключу.
+
+    Страница зависит еще и от пользователя, а формы на ней - от токена
+    CSRF, который меняется при входе.
+    """
+    user = request.user.pk if request.user.is_authenticated else ''
+    csrf = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+    raw = f'{key}:{user}:{csrf}'
+    return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+
+def not_modified(request, key):
+    """Ответ 304, если у клиента уже есть эта версия страницы.
+
+    Решает только ETag, Last-Modified страницы не отдают: правка поста
+    не сдвигает pub_date, и по If-Modified-Since ее не заметить.
+    """
+    return get_conditional_response(request, etag=page_etag(request, key))
+
+
+def set_validators(request, response, key):
+    response['ETag'] = page_etag(request, key)
+    return response
+
+
+def feed_context(request, post_list, key, namespace='feed', **options):
+    """Страница ленты из кеша или из базы, плюс ключ для кеша фрагмента.
+
+    key - ключ из feed_key(). В кеше лежат сами записи страницы и
+    курсоры соседних страниц, так что при попадании запрос к ленте не
+    выполняется. namespace отделяет в кеше страницы с разными записями,
+    например посты для шаблона и словари для API. options уходят в
+    CursorPaginator.
+    """
+    state = cache.get(f'{namespace}:{key}')
+    if state is not None:
+        paginator = CursorPaginator(post_list, POSTS_COUNT, **options)
+        page_obj = paginator.load_page(state)
+    else:
+        page_obj = paginate(request, post_list, POSTS_COUNT, **options)
+        cache.set(f'{namespace}:{key}', page_obj.paginator.dump_page(page_obj),
+                  FEED_CACHE_TIMEOUT)
+    return {
+        'page_obj': page_obj,
+        'feed_key': key,
+        'feed_timeout': FEED_CACHE_TIMEOUT,
+    }
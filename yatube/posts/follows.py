@@ -0,0 +1,72 @@
+from django.core.cache import cache
+from django.db import connection
+from django.db.models.signals import post_delete, post_save
+
+from .feeds import FEED_CACHE_TIMEOUT, feed_versions
+from .models import Follow
+
+
+def following_ids(user_id):
+    """Множество id авторов, на которых подписан пользователь.
+
+    Лежит в кеше под версией ленты ('follow', user_id), которую сдвигает
+    любая подписка и отписка пользователя.
+    """
+    version, = feed_versions(('follow', user_id))
+    key = f'following:{user_id}:v{version}'
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(Follow.objects.filter(user_id=user_id).values_list(
+            'author_id', flat=True))
+        cache.set(key, ids, FEED_CACHE_TIMEOUT)
+    return ids
+
+
+def _columns():
+    ops = connection.ops
+    table = ops.quote_name(Follow._meta.db_table)
+    user, author = (
+        ops.quote_name(Follow._meta.get_field(name).column)
+        for name in ('user', 'author'))
+    return table, user, author
+
+
+def follow(user_id, author_id):
+    """Подписывает одним INSERT. Повторная подписка, в том числе
+    параллельная, упирается в уникальность пары и ничего не меняет.
+
+    Возвращает True, если подписка появилась.
+    """
+    ops = connection.ops
+    table, user, author = _columns()
+    sql = (
+        f'{ops.insert_statement(ignore_conflicts=True)} {table} '
+        f'({user}, {author}) VALUES (%s, %s)'
+        f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user_id, author_id])
+        created = cursor.rowcount == 1
+    if created:
+        # Счетчики, лента подписок и версии обновляются в сигналах.
+        post_save.send(
+            Follow, instance=Follow(user_id=user_id, author_id=author_id),
+            created=True, update_fields=None, raw=False,
+            using=connection.alias)
+    return created
+
+
+def unfollow(user_id, author_id):
+    """Отписывает одним DELETE, без чтения строки. Возвращает True, если
+    подписка была.
+    """
+    table, user, author = _columns()
+    sql = f'DELETE FROM {table} WHERE {user} = %s AND {author} = %s'
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user_id, author_id])
+        deleted = cursor.rowcount == 1
+    if deleted:
+        post_delete.send(
+            Follow, instance=Follow(user_id=user_id, author_id=author_id),
+            using=connection.alias)
+    return deleted
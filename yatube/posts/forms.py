@@ -1,6 +1,9 @@
 from django import forms
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
 from django.utils.translation import gettext_lazy as _
 
+from .images import validate_upload
 from .models import Comment, Post
 
 
@@ -19,6 +22,23 @@ class PostForm(forms.ModelForm):
                 raise forms.ValidationError('Поле не может быть пустым.')
             return data
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Файл сверх лимита LimitedUploadHandler сохраняет не целиком,
+        # ImageField счел бы его битым. Такой файл проверяется отдельно.
+        self.oversized_image = None
+        image = self.files.get('image')
+        if image is not None and image.size > settings.IMAGE_MAX_UPLOAD_SIZE:
+            self.oversized_image = image
+            self.files = self.files.copy()
+            del self.files['image']
+
+    def clean_image(self):
+        image = self.oversized_image or self.cleaned_data['image']
+        if isinstance(image, UploadedFile):
+            validate_upload(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,111 @@
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from PIL import Image, ImageOps
+
+from .feeds import bump_post_feeds
+from .models import Post
+
+# Форматы, в которых остаются EXIF и прочие метаданные. GIF хранит
+# кадры анимации, его пересохранение дороже пользы. Анимированные PNG и
+# WEBP тоже не пересохраняются: остался бы только первый кадр.
+REENCODED_FORMATS = {'JPEG', 'PNG', 'WEBP'}
+# Что снимается из image.info вместе с текстовыми блоками PNG.
+# Прозрачность и цветовой профиль нужны для отрисовки и остаются.
+METADATA_KEYS = {'exif', 'xmp', 'XML:com.adobe.xmp', 'comment'}
+# Блоки JPEG, которые пересохранение создает заново (JFIF, цветовой
+# профиль, Adobe). Остальные APPn - это EXIF, XMP, IPTC и подобное.
+JPEG_KEPT_MARKERS = {'APP0', 'APP2', 'APP14'}
+MB = 1024 * 1024
+
+
+class LimitedUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загрузку во временный файл кусками и перестает писать
+    после IMAGE_MAX_UPLOAD_SIZE байт.
+
+    Остаток тела запроса дочитывается, но не сохраняется, а размер
+    файла считается полностью, чтобы форма отклонила его.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.IMAGE_MAX_UPLOAD_SIZE:
+            return None
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        return super().file_complete(self.received)
+
+
+def validate_upload(file):
+    """Проверяет размер загрузки и картинки по ее заголовку.
+
+    forms.ImageField открывает временный файл без декодирования
+    пикселей и кладет открытую картинку в file.image.
+    """
+    if file.size > settings.IMAGE_MAX_UPLOAD_SIZE:
+        raise ValidationError(
+            'Файл больше %(limit)s МБ.', code='file_too_large',
+            params={'limit': settings.IMAGE_MAX_UPLOAD_SIZE // MB})
+    if max(file.image.size) > settings.IMAGE_MAX_SIDE:
+        raise ValidationError(
+            'Сторона картинки больше %(limit)s пикселей.',
+            code='image_too_large',
+            params={'limit': settings.IMAGE_MAX_SIDE})
+
+
+def has_metadata(image):
+    markers = {marker for marker, _ in getattr(image, 'applist', ())}
+    return bool(
+        METADATA_KEYS & image.info.keys()
+        or getattr(image, 'text', None)
+        or markers - JPEG_KEPT_MARKERS
+    )
+
+
+def strip_metadata(post_id):
+    """Пересохраняет картинку поста без EXIF и прочих метаданных.
+
+    Картинка без метаданных не пересохраняется: JPEG потерял бы
+    качество.
+    """
+    post = Post.objects.filter(pk=post_id).only(
+        'image', 'author', 'group').first()
+    if post is None or not post.image:
+        return False
+    name = post.image.name
+    with post.image.open('rb'), Image.open(post.image) as image:
+        image_format = image.format
+        if (image_format not in REENCODED_FORMATS
+                or getattr(image, 'is_animated', False)
+                or not has_metadata(image)):
+            return False
+        text = getattr(image, 'text', {})
+        image = ImageOps.exif_transpose(image)
+        icc_profile = image.info.get('icc_profile')
+        image.info = {
+            key: value for key, value in image.info.items()
+            if key not in METADATA_KEYS and key not in text
+        }
+        buffer = BytesIO()
+        options = {'icc_profile': icc_profile} if icc_profile else {}
+        if image_format == 'JPEG':
+            options['quality'] = 90
+        image.save(buffer, format=image_format, **options)
+    storage = post.image.storage
+    new_name = storage.save(name, ContentFile(buffer.getvalue()))
+    # Пока картинка пересохранялась, ее могли заменить.
+    if not Post.objects.filter(pk=post_id, image=name).update(image=new_name):
+        storage.delete(new_name)
+        return False
+    storage.delete(name)
+    # Закешированные страницы ссылаются на удаленный файл.
+    bump_post_feeds(post)
+    return True
@@ -0,0 +1,89 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Q
+from django.utils import timezone
+
+from posts.feeds import COMMENTS_COUNT, POSTS_COUNT
+from posts.models import Comment, Follow, Post, TimelineEntry
+from posts.paginator import CursorPaginator
+
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+def is_full_scan(step):
+    return step.startswith('SCAN') and 'USING' not in step
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет EXPLAIN QUERY PLAN для запросов лент и падает, '
+        'если находит полный скан таблицы или сортировку во временном '
+        'B-tree. Запускать на базе, заполненной данными.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def feed_pages(self, name, post_list, per_page=POSTS_COUNT, **options):
+        paginator = CursorPaginator(post_list, per_page, **options)
+        after = paginator.cursor_filter(timezone.now(), 1)
+        yield name, paginator.object_list[:per_page + 1]
+        yield f'{name} (cursor)', (
+            paginator.object_list.filter(after)[:per_page + 1])
+
+    def querysets(self):
+        # Значения параметров на план не влияют, важна только форма запроса.
+        yield from self.feed_pages('index', Post.objects.all())
+        yield from self.feed_pages(
+            'group_posts', Post.objects.filter(group_id=1))
+        yield from self.feed_pages(
+            'profile', Post.objects.filter(author_id=1))
+        timeline = TimelineEntry.objects.filter(user_id=1)
+        yield from self.feed_pages(
+            'follow_index', timeline, tiebreak='post_id')
+        followed = Follow.objects.filter(user_id=1).values('author')
+        mixed = Post.objects.filter(
+            Q(pk__in=timeline.values('post')) | Q(author__in=followed))
+        yield from self.feed_pages('follow_index (popular)', mixed)
+        yield 'profile (following)', Follow.objects.filter(
+            user_id=1, author_id=2)[:1]
+        yield from self.feed_pages(
+            'post_detail (comments)', Comment.objects.filter(post_id=1),
+            COMMENTS_COUNT, key='created')
+
+    # Подписчики популярных авторов читают их посты вместе со своей
+    # лентой, без сортировки такую выборку не упорядочить.
+    allowed = {
+        'follow_index (popular)': (TEMP_SORT,),
+        'follow_index (popular) (cursor)': (TEMP_SORT,),
+    }
+
+    def explain(self, connection, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError(
+                'EXPLAIN QUERY PLAN поддерживается только для SQLite.')
+        failures = []
+        for name, queryset in self.querysets():
+            allowed = self.allowed.get(name, ())
+            plan = self.explain(connection, queryset)
+            problems = [
+                step for step in plan
+                if (is_full_scan(step) or step.startswith(TEMP_SORT))
+                and not step.startswith(allowed)
+            ]
+            style = self.style.ERROR if problems else self.style.SUCCESS
+            self.stdout.write(style(name))
+            for step in plan:
+                self.stdout.write(f'    {step}')
+            if problems:
+                failures.append(name)
+        if failures:
+            raise CommandError(
+                'Запросы без подходящего индекса: ' + ', '.join(failures))
@@ -0,0 +1,28 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from posts.transfer import FORMATS, export_records, guess_format, write_records
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает посты в JSONL или CSV построчно, не загружая их '
+        'в память. Без пути пишет в стандартный вывод.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+        records = export_records(chunk_size=options['chunk_size'])
+        if path == '-':
+            count = write_records(sys.stdout, fmt, records)
+        else:
+            with open(path, 'w', encoding='utf-8', newline='') as stream:
+                count = write_records(stream, fmt, records)
+        self.stderr.write(f'Выгружено постов: {count}.')
@@ -0,0 +1,32 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from posts.transfer import FORMATS, Importer, guess_format, read_records
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает посты из JSONL или CSV (поля author, group, pub_date, '
+        'text, image) пачками через bulk_create. Автор и группа ищутся '
+        'по username и slug, записи с неизвестными пропускаются. Путь - '
+        'означает стандартный ввод.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+        importer = Importer(
+            batch_size=options['batch_size'], log=self.stderr.write)
+        if path == '-':
+            created, skipped = importer.run(read_records(sys.stdin, fmt))
+        else:
+            with open(path, encoding='utf-8', newline='') as stream:
+                created, skipped = importer.run(read_records(stream, fmt))
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено постов: {created}, пропущено: {skipped}.'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.timeline import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново раскладывает посты по лентам подписок, если таблица '
+        'лент разошлась с подписками.'
+    )
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        entries = rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей в лентах: {entries}.'))
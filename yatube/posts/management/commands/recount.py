@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.counters import recount_groups, recount_posts, recount_users
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает хранимые счетчики постов, комментариев и подписок, '
+        'если они разошлись с данными.'
+    )
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        users = recount_users()
+        groups = recount_groups()
+        posts = recount_posts()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано: пользователей {users}, групп {groups}, '
+            f'постов {posts}.'
+        ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.thumbnails import process
+
+
+class Command(BaseCommand):
+    help = (
+        'Готовит миниатюры картинок постов, у которых их еще нет, '
+        'например после переноса медиафайлов.'
+    )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').filter(
+            thumbnail_url='').values_list('pk', flat=True)
+        count = 0
+        for post_id in posts.iterator():
+            if process(post_id):
+                count += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово миниатюр: {count}.'))
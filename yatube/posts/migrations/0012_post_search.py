@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.db import migrations
+
+FTS_TABLE = 'posts_post_fts'
+
+SQLITE_FORWARD = [
+    f'''
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        text,
+        content='posts_post',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    ''',
+    f'''
+    CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF text ON posts_post
+    BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    ''',
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+SQLITE_BACKWARD = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_insert',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_delete',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_update',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def postgresql_forward():
+    config = getattr(settings, 'SEARCH_CONFIG', 'russian')
+    return [
+        f'''
+        ALTER TABLE posts_post ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            to_tsvector('{config}'::regconfig, coalesce(text, ''))
+        ) STORED
+        ''',
+        '''
+        CREATE INDEX posts_post_search_idx ON posts_post
+        USING GIN (search_vector)
+        ''',
+    ]
+
+
+POSTGRESQL_BACKWARD = [
+    'DROP INDEX IF EXISTS posts_post_search_idx',
+    'ALTER TABLE posts_post DROP COLUMN IF EXISTS search_vector',
+]
+
+
+def create_search_index(apps, schema_editor):
+    statements = {
+        'sqlite': SQLITE_FORWARD,
+        'postgresql': postgresql_forward(),
+    }
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    statements = {
+        'sqlite': SQLITE_BACKWARD,
+        'postgresql': POSTGRESQL_BACKWARD,
+    }
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_post_thumbnail_url'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 2.2.16 on 2026-10-17 06:52
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicates(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    UserStats = apps.get_model('posts', 'UserStats')
+    duplicates = list(Follow.objects.order_by().values(
+        'user', 'author').annotate(
+        keep=Min('pk'), count=Count('pk')).filter(count__gt=1))
+    users = set()
+    for row in duplicates:
+        Follow.objects.filter(
+            user=row['user'], author=row['author']).exclude(
+            pk=row['keep']).delete()
+        users.update((row['user'], row['author']))
+    # Дубли раздували счетчики подписок и подписчиков.
+    for user_id in users:
+        UserStats.objects.filter(user_id=user_id).update(
+            followers_count=Follow.objects.filter(author=user_id).count(),
+            following_count=Follow.objects.filter(user=user_id).count(),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_comment_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='follow_unique'),
+        ),
+        migrations.RemoveIndex(
+            model_name='follow',
+            name='follow_user_author_idx',
+        ),
+    ]
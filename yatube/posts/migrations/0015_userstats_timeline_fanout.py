@@ -0,0 +1,27 @@
+# Generated by Django 2.2.16 on 2026-10-17 07:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def pause_popular(apps, schema_editor):
+    UserStats = apps.get_model('posts', 'UserStats')
+    UserStats.objects.filter(
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+    ).update(timeline_fanout=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_follow_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstats',
+            name='timeline_fanout',
+            field=models.BooleanField(default=True, verbose_name='Посты раскладываются по лентам'),
+        ),
+        migrations.RunPython(pause_popular, migrations.RunPython.noop),
+    ]
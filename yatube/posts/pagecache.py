@@ -0,0 +1,71 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .feeds import feed_key, not_modified, set_validators
+
+
+def page_cache_key(request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'page:{path}'
+
+
+def cacheable(request, response):
+    # Страница с токеном CSRF или с cookie у каждого своя.
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get('CSRF_COOKIE_USED')
+        and hasattr(request, 'feed_scopes')
+    )
+
+
+def serve(request, response, key):
+    return not_modified(request, key) or set_validators(
+        request, response, key)
+
+
+def anonymous_page_cache(view):
+    """Кеширует страницу ленты целиком для анонимных GET по пути и строке
+    запроса.
+
+    Копия свежая PAGE_CACHE_TIMEOUT секунд и, пока не сдвинулись версии
+    лент, от которых зависит страница. Устаревшую копию перерисовывает
+    один процесс: он берет блокировку в кеше, а остальные до конца
+    перерисовки отдают старую копию. Блокировка - это add кеша: в file и
+    db он не атомарен, и перерисовать страницу могут сразу несколько
+    процессов. Сама копия хранится PAGE_CACHE_STALE_TIMEOUT секунд.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (not settings.PAGE_CACHE_TIMEOUT or request.method != 'GET'
+                or request.user.is_authenticated):
+            return view(request, *args, **kwargs)
+        cache_key = page_cache_key(request)
+        entry = cache.get(cache_key)
+        if entry is not None:
+            scopes, key, expires, response = entry
+            if (time.time() < expires
+                    and feed_key(request, *scopes) == key):
+                return serve(request, response, key)
+        lock_key = f'{cache_key}:lock'
+        locked = cache.add(lock_key, 1, settings.PAGE_CACHE_LOCK_TIMEOUT)
+        if not locked and entry is not None:
+            return serve(request, response, key)
+        try:
+            response = view(request, *args, **kwargs)
+            if cacheable(request, response):
+                expires = time.time() + settings.PAGE_CACHE_TIMEOUT
+                cache.set(cache_key, (
+                    request.feed_scopes, request.feed_key, expires,
+                    response,
+                ), settings.PAGE_CACHE_STALE_TIMEOUT)
+        finally:
+            if locked:
+                cache.delete(lock_key)
+        return response
+    return wrapper
@@ -0,0 +1,167 @@
+import base64
+import math
+from datetime import datetime
+from functools import partial
+
+from django.core.paginator import Paginator
+from django.db.models import DateTimeField, Q
+from django.utils.dateparse import parse_datetime
+
+NEXT = 'n'
+PREVIOUS = 'p'
+# OFFSET в базе - 64-битное целое со знаком.
+MAX_OFFSET = 2 ** 63 - 1
+
+
+def encode_cursor(direction, value, pk):
+    """Непрозрачный токен позиции в ленте: направление, ключ и id.
+
+    Ключ - дата или число, например релевантность в поиске.
+    """
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    else:
+        value = repr(float(value))
+    raw = f'{direction}|{value}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_value(value):
+    parsed = parse_datetime(value)
+    if parsed is not None:
+        return parsed
+    parsed = float(value)
+    return parsed if math.isfinite(parsed) else None
+
+
+def decode_cursor(token):
+    """Разбирает токен курсора, для битого токена возвращает None."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        direction, value, pk = raw.decode().split('|')
+        value = decode_value(value)
+        pk = int(pk)
+    except ValueError:
+        return None
+    if direction not in (NEXT, PREVIOUS) or value is None:
+        return None
+    return direction, value, pk
+
+
+class CursorPaginator(Paginator):
+    """Keyset-пагинация по паре (key, id).
+
+    Страница выбирается условием по ключу крайней показанной записи,
+    поэтому запрос не зависит от глубины ленты и не требует COUNT(*).
+    Старые ссылки вида ?page=N обслуживаются через OFFSET, тоже без
+    COUNT(*). Экземпляр обслуживает одну страницу: после get_page()
+    в нем лежат курсоры соседних страниц, а num_pages знает только
+    о них, чтобы методы обычного Page работали без подсчета записей.
+
+    tiebreak - уникальное поле, которое упорядочивает записи с равным
+    ключом. transform превращает строки страницы в то, что получит
+    шаблон, например записи ленты подписок в посты. Строками могут быть
+    и словари из values().
+    """
+
+    def __init__(self, object_list, per_page, key='-pub_date',
+                 tiebreak='pk', transform=None):
+        self.descending = key.startswith('-')
+        self.key = key.lstrip('-')
+        self.tiebreak = tiebreak
+        self.transform = transform
+        sign = '-' if self.descending else ''
+        super().__init__(
+            object_list.order_by(f'{sign}{self.key}', f'{sign}{tiebreak}'),
+            per_page
+        )
+        self.next_cursor = None
+        self.previous_cursor = None
+        self._num_pages = 1
+
+    @property
+    def num_pages(self):
+        return self._num_pages
+
+    def key_is_date(self):
+        query = self.object_list.query
+        if self.key in query.annotations:
+            field = query.annotations[self.key].output_field
+        else:
+            field = self.object_list.model._meta.get_field(self.key)
+        return isinstance(field, DateTimeField)
+
+    def get_page(self, number=None, cursor=None):
+        decoded = decode_cursor(cursor) if cursor else None
+        # Курсор с числом вместо даты (или наоборот) сравнивать с ключом
+        # нельзя: такой токен считается битым.
+        if decoded is not None and (
+                isinstance(decoded[1], datetime) == self.key_is_date()):
+            return self.page_from_cursor(*decoded)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            number = 1
+        if not 1 <= number <= MAX_OFFSET // self.per_page:
+            number = 1
+        return self.page_from_number(number)
+
+    def page_from_number(self, number):
+        bottom = (number - 1) * self.per_page
+        items = list(self.object_list[bottom:bottom + self.per_page + 1])
+        return self._page(items[:self.per_page], number,
+                          has_next=len(items) > self.per_page)
+
+    def cursor_filter(self, value, pk, forward=True):
+        lookup = 'lt' if forward == self.descending else 'gt'
+        return Q(**{f'{self.key}__{lookup}e': value}) & (
+            Q(**{f'{self.key}__{lookup}': value})
+            | Q(**{f'{self.tiebreak}__{lookup}': pk})
+        )
+
+    def page_from_cursor(self, direction, value, pk):
+        forward = direction == NEXT
+        items = self.object_list.filter(
+            self.cursor_filter(value, pk, forward))
+        if not forward:
+            items = items.reverse()
+        items = list(items[:self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if forward:
+            return self._page(items, 2, has_next=has_more)
+        items.reverse()
+        return self._page(items, 2 if has_more else 1, has_next=True)
+
+    def _cursor(self, direction, obj):
+        # Строки из values() - словари, а не модели.
+        get = obj.get if isinstance(obj, dict) else partial(getattr, obj)
+        return encode_cursor(direction, get(self.key), get(self.tiebreak))
+
+    def _page(self, items, number, has_next):
+        self._num_pages = number + 1 if has_next else number
+        if items and has_next:
+            self.next_cursor = self._cursor(NEXT, items[-1])
+        if items and number > 1:
+            self.previous_cursor = self._cursor(PREVIOUS, items[0])
+        if self.transform is not None:
+            items = self.transform(items)
+        return self._get_page(items, number, self)
+
+    def dump_page(self, page):
+        """Состояние страницы для кеша, без ссылки на queryset."""
+        return (list(page.object_list), page.number, self._num_pages,
+                self.next_cursor, self.previous_cursor)
+
+    def load_page(self, state):
+        items, number, self._num_pages, self.next_cursor, \
+            self.previous_cursor = state
+        return self._get_page(items, number, self)
+
+
+def paginate(request, object_list, per_page, **options):
+    paginator = CursorPaginator(object_list, per_page, **options)
+    return paginator.get_page(
+        number=request.GET.get('page'),
+        cursor=request.GET.get('cursor'),
+    )
@@ -0,0 +1,94 @@
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+MAX_TERMS = 10
+
+# Django пересоздает таблицу при части изменений схемы в SQLite, и
+# триггеры старой таблицы пропадают. После миграций они создаются
+# заново, если их нет.
+SQLITE_TRIGGERS = [
+    f'''
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert
+    AFTER INSERT ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete
+    AFTER DELETE ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update
+    AFTER UPDATE OF text ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    ''',
+]
+
+
+def restore_triggers(using='default', **kwargs):
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM sqlite_master WHERE name = %s', [FTS_TABLE])
+        if cursor.fetchone() is None:
+            return
+        for sql in SQLITE_TRIGGERS:
+            cursor.execute(sql)
+
+
+def fts_query(text):
+    """Запрос FTS5 из слов пользователя: все слова, каждое как префикс.
+
+    Слова берутся в кавычки, поэтому синтаксис FTS5 (NEAR, OR, скобки)
+    из пользовательского ввода не работает и не ломает запрос.
+    """
+    words = re.findall(r'\w+', text)[:MAX_TERMS]
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_posts(text, posts=None, using='default'):
+    """Посты, подходящие под запрос, и параметры CursorPaginator,
+    которые упорядочивают их по релевантности.
+    """
+    posts = Post.objects.all() if posts is None else posts
+    vendor = connections[using].vendor
+    if vendor == 'sqlite':
+        match = fts_query(text)
+        if not match:
+            return posts.none(), {}
+        found = (
+            f'posts_post.id IN (SELECT rowid FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s)'
+        )
+        rank = RawSQL(
+            f'SELECT rank FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = posts_post.id',
+            [match], output_field=FloatField())
+        # bm25 в FTS5 тем меньше, чем лучше совпадение.
+        return posts.extra(where=[found], params=[match]).annotate(
+            rank=rank), {'key': 'rank', 'tiebreak': 'pk'}
+    if vendor == 'postgresql':
+        query = 'websearch_to_tsquery(%s, %s)'
+        params = [settings.SEARCH_CONFIG, text]
+        found = f'posts_post.search_vector @@ {query}'
+        rank = RawSQL(
+            f'ts_rank(posts_post.search_vector, {query})', params,
+            output_field=FloatField())
+        return posts.extra(where=[found], params=params).annotate(
+            rank=rank), {'key': '-rank'}
+    return posts.filter(text__icontains=text), {}
@@ -0,0 +1,107 @@
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from .counters import add, add_user_stat
+from .feeds import bump_post_feeds, bump_version
+from .models import Comment, Follow, Group, Post, User, UserStats
+from .thumbnails import schedule as schedule_thumbnail
+from .timeline import (backfill, fan_out, pause_fanout, remove,
+                       resume_fanout)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    if created:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_feeds(sender, instance, **kwargs):
+    # При редактировании пост может уйти из старой группы: ее ленту
+    # тоже нужно сбросить. Миниатюра старой картинки новой не подходит.
+    old = None
+    if instance.pk is not None:
+        old = Post.objects.filter(pk=instance.pk).values_list(
+            'group_id', 'image').first()
+    instance._old_group_id, old_image = old or (None, None)
+    instance._image_changed = (
+        instance.image.name != old_image or not instance.image._committed)
+    if instance._image_changed:
+        instance.thumbnail_url = ''
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    bump_post_feeds(instance)
+    if getattr(instance, '_image_changed', False):
+        schedule_thumbnail(instance)
+    old_group_id = getattr(instance, '_old_group_id', None)
+    if created:
+        add_user_stat(instance.author_id, 'posts_count', 1)
+        fan_out(instance)
+    elif old_group_id == instance.group_id:
+        return
+    if old_group_id is not None:
+        bump_version('group', old_group_id)
+        add(Group.objects.filter(pk=old_group_id), 'posts_count', -1)
+    if instance.group_id is not None:
+        add(Group.objects.filter(pk=instance.group_id), 'posts_count', 1)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    bump_post_feeds(instance)
+    add_user_stat(instance.author_id, 'posts_count', -1)
+    if instance.group_id is not None:
+        add(Group.objects.filter(pk=instance.group_id), 'posts_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    bump_version('post', instance.post_id)
+    if created:
+        add(Post.objects.filter(pk=instance.post_id), 'comments_count', 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    bump_version('post', instance.post_id)
+    add(Post.objects.filter(pk=instance.post_id), 'comments_count', -1)
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    # Ссылки на группу есть в постах любой ленты, поэтому сбрасываются
+    # и общая лента, и профили авторов группы.
+    bump_version('index')
+    bump_version('group', instance.pk)
+    authors = Post.objects.filter(group=instance).order_by().values_list(
+        'author_id', flat=True).distinct()
+    for author_id in authors:
+        bump_version('profile', author_id)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    bump_version('follow', instance.user_id)
+    # В профилях обоих пользователей выведены счетчики подписок.
+    bump_version('profile', instance.author_id)
+    bump_version('profile', instance.user_id)
+    if created:
+        add_user_stat(instance.author_id, 'followers_count', 1)
+        add_user_stat(instance.user_id, 'following_count', 1)
+        pause_fanout(instance.author_id)
+        backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    bump_version('follow', instance.user_id)
+    bump_version('profile', instance.author_id)
+    bump_version('profile', instance.user_id)
+    add_user_stat(instance.author_id, 'followers_count', -1)
+    add_user_stat(instance.user_id, 'following_count', -1)
+    remove(instance.user_id, instance.author_id)
+    resume_fanout(instance.author_id)
@@ -1,8 +1,16 @@
-from django.core.cache import cache
-from django.test import Client, TestCase
+import multiprocessing
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.test import SimpleTestCase, TestCase, override_settings
 from django.urls import reverse
 
+from posts.feeds import bump_version, feed_versions
 from posts.models import Group, Post, User
+from posts.tests.utils import QueryBudgetClient
 
 
 class CacheViewsTests(TestCase):
@@ -22,17 +30,150 @@ class CacheViewsTests(TestCase):
         )
 
     def setUp(self):
-        self.user_client = Client()
+        cache.clear()
+        self.user_client = QueryBudgetClient()
         self.user_client.force_login(self.user)
 
     def test_cache_works(self):
+        """Лента отдается из кеша, пока ее не сбросят."""
         response = self.user_client.get(reverse('posts:index_posts'))
-        before_deletion = response.content
-        self.post.delete()
+        before_update = response.content
+        Post.objects.filter(pk=self.post.pk).update(text='Тихая правка')
         second_response = self.user_client.get(reverse('posts:index_posts'))
-        after_deletion = second_response.content
-        self.assertEqual(before_deletion, after_deletion)
+        self.assertEqual(before_update, second_response.content)
         cache.clear()
         third_response = self.user_client.get(reverse('posts:index_posts'))
-        after_cache = third_response.content
-        self.assertNotEqual(before_deletion, after_cache)
+        self.assertContains(third_response, 'Тихая правка')
+
+    def test_delete_resets_feeds(self):
+        """Удаленный пост сразу пропадает из закешированных лент."""
+        urls = (
+            reverse('posts:index_posts'),
+            reverse('posts:group', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': self.author.username}),
+        )
+        for url in urls:
+            self.assertContains(self.user_client.get(url), self.post.text)
+        Post.objects.get(pk=self.post.pk).delete()
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertNotContains(
+                    self.user_client.get(url), self.post.text)
+
+    def test_group_change_resets_old_group(self):
+        """Пост, перенесенный в другую группу, пропадает из старой."""
+        url = reverse('posts:group', kwargs={'slug': self.group.slug})
+        self.assertContains(self.user_client.get(url), self.post.text)
+        post = Post.objects.get(pk=self.post.pk)
+        post.group = Group.objects.create(title='Другая', slug='other')
+        post.save()
+        self.assertNotContains(self.user_client.get(url), self.post.text)
+
+    def test_cache_varies_on_page(self):
+        """Каждая страница ленты кешируется отдельно."""
+        for i in range(10):
+            Post.objects.create(author=self.author, text=f'Пост {i}')
+        first_page = self.user_client.get(reverse('posts:index_posts'))
+        cursor = first_page.context['page_obj'].paginator.next_cursor
+        second_page = self.user_client.get(
+            reverse('posts:index_posts'), {'cursor': cursor})
+        self.assertNotEqual(first_page.content, second_page.content)
+        self.assertIn(self.post.text, second_page.content.decode())
+
+    def test_cache_varies_on_user_state(self):
+        """Гость не получает закешированный для пользователя фрагмент."""
+        self.user_client.get(reverse('posts:index_posts'))
+        response = QueryBudgetClient().get(reverse('posts:index_posts'))
+        self.assertNotContains(response, reverse('posts:follow_index'))
+
+    def test_new_post_resets_feeds(self):
+        """Новый пост сразу появляется в лентах автора."""
+        author_client = QueryBudgetClient()
+        author_client.force_login(self.author)
+        urls = (
+            reverse('posts:index_posts'),
+            reverse('posts:group', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': self.author.username}),
+        )
+        for url in urls:
+            self.user_client.get(url)
+        author_client.post(reverse('posts:post_create'), {
+            'text': 'Свежий пост', 'group': self.group.pk})
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.user_client.get(url), 'Свежий пост')
+
+    def test_follow_resets_follow_feed(self):
+        """Подписка сразу меняет ленту подписок."""
+        self.user_client.get(reverse('posts:follow_index'))
+        self.user_client.get(reverse(
+            'posts:profile_follow',
+            kwargs={'username': self.author.username}))
+        response = self.user_client.get(reverse('posts:follow_index'))
+        self.assertContains(response, self.post.text)
+
+
+TEMP_CACHE_DIR = tempfile.mkdtemp()
+
+
+def bump_in_other_process(*scope):
+    process = multiprocessing.get_context('fork').Process(
+        target=bump_version, args=scope)
+    process.start()
+    process.join()
+    return process.exitcode
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'LOCAL_TIMEOUT': 60,
+            'SHARED_ONLY_PREFIXES': ('feed-version:',),
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': TEMP_CACHE_DIR,
+    },
+})
+class SharedCacheTests(SimpleTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_CACHE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_version_bump_crosses_processes(self):
+        """Сброс ленты в другом процессе виден этому процессу сразу."""
+        before = feed_versions(('index',))
+        self.assertEqual(bump_in_other_process('index'), 0)
+        self.assertNotEqual(feed_versions(('index',)), before)
+
+    def test_bumped_version_does_not_expire(self):
+        """После сдвига версия в файловом кеше остается бессрочной."""
+        before = feed_versions(('index',))
+        bump_version('index')
+        later = time.time() + 60 * 60 * 24
+        with mock.patch('time.time', return_value=later):
+            self.assertEqual(feed_versions(('index',)), [before[0] + 2])
+
+    def test_local_tier_serves_hot_keys(self):
+        """Локальный уровень отдает ключ, пока не истек его срок."""
+        cache.set('feed:page', 'страница')
+        cache.set('feed-version:index', 1)
+        caches['shared'].clear()
+        self.assertEqual(cache.get('feed:page'), 'страница')
+        self.assertIsNone(cache.get('feed-version:index'))
+
+    def test_local_tier_returns_copies(self):
+        """Изменение полученного объекта не меняет запись в кеше."""
+        cache.set('feed:page', {'rows': [1]})
+        cache.get('feed:page')['rows'].append(2)
+        caches['shared'].clear()
+        self.assertEqual(cache.get('feed:page'), {'rows': [1]})
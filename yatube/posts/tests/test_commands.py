@@ -0,0 +1,167 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import Follow, Group, Post, TimelineEntry, User, UserStats
+from posts.transfer import Importer
+
+
+class ExplainFeedsCommandTests(TestCase):
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент не сканируют таблицы целиком."""
+        out = StringIO()
+        call_command('explain_feeds', stdout=out)
+        self.assertIn('post_pub_date_idx', out.getvalue())
+
+
+class RecountCommandTests(TestCase):
+    def test_recount_repairs_drift(self):
+        """recount чинит разошедшиеся счетчики."""
+        author = User.objects.create_user(username='Автор')
+        group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.create(author=author, group=group, text='Текст')
+        UserStats.objects.filter(user=author).update(posts_count=42)
+        Group.objects.filter(pk=group.pk).update(posts_count=0)
+        call_command('recount', stdout=StringIO())
+        author.stats.refresh_from_db()
+        group.refresh_from_db()
+        self.assertEqual(author.stats.posts_count, 1)
+        self.assertEqual(group.posts_count, 1)
+
+
+class RebuildTimelineCommandTests(TestCase):
+    def test_rebuild_restores_timeline(self):
+        """rebuild_timeline раскладывает посты по подпискам заново."""
+        author = User.objects.create_user(username='Автор')
+        user = User.objects.create_user(username='Подписчик')
+        post = Post.objects.create(author=author, text='Текст')
+        Follow.objects.create(author=author, user=user)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timeline', stdout=StringIO())
+        self.assertEqual(
+            list(user.timeline.values_list('post', flat=True)), [post.pk])
+
+    def test_rebuild_resumes_fanout(self):
+        """rebuild_timeline снова раскладывает посты авторов, у которых
+        подписчиков меньше порога.
+        """
+        author = User.objects.create_user(username='Автор')
+        user = User.objects.create_user(username='Подписчик')
+        Follow.objects.create(author=author, user=user)
+        UserStats.objects.filter(user=author).update(timeline_fanout=False)
+        post = Post.objects.create(author=author, text='Текст')
+        call_command('rebuild_timeline', stdout=StringIO())
+        self.assertTrue(UserStats.objects.get(user=author).timeline_fanout)
+        self.assertEqual(
+            list(user.timeline.values_list('post', flat=True)), [post.pk])
+
+
+class TransferCommandsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Автор')
+        cls.follower = User.objects.create_user(username='Подписчик')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Follow.objects.create(user=cls.follower, author=cls.author)
+        Post.objects.create(author=cls.author, group=cls.group, text='Один')
+        Post.objects.create(author=cls.author, text='Два, "с кавычками"')
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.dir.name, name)
+
+    def posts(self):
+        return list(Post.objects.order_by('pk').values_list(
+            'author', 'group', 'pub_date', 'text'))
+
+    def test_export_import_round_trip(self):
+        """Выгруженные посты загружаются обратно без потерь."""
+        for name in ('posts.jsonl', 'posts.csv'):
+            with self.subTest(name=name):
+                expected = self.posts()
+                call_command(
+                    'export_posts', self.path(name), stderr=StringIO())
+                Post.objects.all().delete()
+                call_command('import_posts', self.path(name),
+                             '--batch-size', '1', stdout=StringIO())
+                self.assertEqual(self.posts(), expected)
+
+    def test_import_updates_counters_and_timeline(self):
+        """После загрузки счетчики и ленты подписчиков актуальны."""
+        with open(self.path('posts.jsonl'), 'w') as stream:
+            stream.write(json.dumps({'author': 'Автор', 'text': 'Новый',
+                                     'group': 'group'}) + '\n')
+        call_command('import_posts', self.path('posts.jsonl'),
+                     stdout=StringIO())
+        self.author.stats.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertEqual(self.author.stats.posts_count, 3)
+        self.assertEqual(self.group.posts_count, 2)
+        self.assertEqual(self.follower.timeline.count(), 3)
+
+    def test_import_fans_out_only_new_posts(self):
+        """Загрузка раскладывает по лентам только новые посты, а не
+        собирает ленты подписчиков заново.
+        """
+        TimelineEntry.objects.all().delete()
+        with open(self.path('posts.jsonl'), 'w') as stream:
+            stream.write(json.dumps({'author': 'Автор', 'text': 'Новый'}))
+        call_command('import_posts', self.path('posts.jsonl'),
+                     stdout=StringIO())
+        self.assertEqual(
+            list(self.follower.timeline.values_list('post__text', flat=True)),
+            ['Новый'])
+
+    def test_import_skips_unknown_references(self):
+        """Записи с неизвестным автором или группой пропускаются."""
+        records = [
+            {'author': 'Никто', 'text': 'Текст'},
+            {'author': 'Автор', 'group': 'nowhere', 'text': 'Текст'},
+            {'author': 'Автор', 'text': ''},
+            {'author': 'Автор', 'text': 'Текст', 'pub_date': 'вчера'},
+        ]
+        with open(self.path('posts.jsonl'), 'w') as stream:
+            for record in records:
+                stream.write(json.dumps(record) + '\n')
+        out, err = StringIO(), StringIO()
+        call_command('import_posts', self.path('posts.jsonl'),
+                     stdout=out, stderr=err)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertIn('пропущено: 4', out.getvalue())
+        self.assertIn('Никто', err.getvalue())
+
+    def test_import_skips_broken_lines(self):
+        """Битые строки JSONL пропускаются, остальное загружается
+        вместе со счетчиками.
+        """
+        with open(self.path('posts.jsonl'), 'w') as stream:
+            stream.write(json.dumps({'author': 'Автор', 'text': 'Один'}))
+            stream.write('\n{"author": "Автор", "text"\n[1, 2]\n')
+            stream.write(json.dumps({'author': 'Автор', 'text': 'Два'}))
+        out, err = StringIO(), StringIO()
+        call_command('import_posts', self.path('posts.jsonl'),
+                     '--batch-size', '1', stdout=out, stderr=err)
+        self.author.stats.refresh_from_db()
+        self.assertEqual(self.author.stats.posts_count, 4)
+        self.assertIn('пропущено: 2', out.getvalue())
+        self.assertIn('Запись 2 пропущена: неверный JSON', err.getvalue())
+
+    def test_import_finishes_after_error(self):
+        """Если импорт оборвался, записанные пачки учтены в счетчиках."""
+        def records():
+            yield {'author': 'Автор', 'text': 'Один'}
+            raise OSError('поток оборвался')
+
+        importer = Importer(batch_size=1)
+        with self.assertRaises(OSError):
+            importer.run(records())
+        self.author.stats.refresh_from_db()
+        self.assertEqual(self.author.stats.posts_count, 3)
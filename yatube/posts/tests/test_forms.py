@@ -1,13 +1,18 @@
 import shutil
 import tempfile
+from io import BytesIO
 
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase, override_settings
+from django.test import TestCase, override_settings
 from django.urls import reverse
+from PIL import Image, PngImagePlugin
 
+from posts.feeds import feed_versions
 from posts.forms import PostForm
+from posts.images import strip_metadata
 from posts.models import Comment, Group, Post, User
+from posts.tests.utils import QueryBudgetClient
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -55,8 +60,8 @@ class PostFormTests(TestCase):
         shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
 
     def setUp(self):
-        self.guest_client = Client()
-        self.authorized_client = Client()
+        self.guest_client = QueryBudgetClient()
+        self.authorized_client = QueryBudgetClient()
         self.authorized_client.force_login(self.user)
 
     def test_create_post(self):
@@ -152,3 +157,126 @@ class PostFormTests(TestCase):
         self.assertRedirects(
             response, f'/auth/login/?next=/posts/{self.post.pk}/comment/')
         self.assertEqual(Post.objects.count(), comments_count)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageUploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = QueryBudgetClient()
+        self.authorized_client.force_login(self.user)
+
+    def jpeg(self, size=(8, 6), exif=None):
+        buffer = BytesIO()
+        options = {'exif': exif.tobytes()} if exif else {}
+        Image.new('RGB', size).save(buffer, 'JPEG', **options)
+        return SimpleUploadedFile('photo.jpg', buffer.getvalue(), 'image/jpeg')
+
+    def upload(self):
+        return self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Текст', 'image': self.jpeg()},
+        )
+
+    @override_settings(IMAGE_MAX_UPLOAD_SIZE=100)
+    def test_oversized_upload_rejected(self):
+        """Файл больше лимита отклоняется формой."""
+        response = self.upload()
+        self.assertFormError(
+            response, 'form', 'image', 'Файл больше 0 МБ.')
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(IMAGE_MAX_SIDE=4)
+    def test_large_image_rejected(self):
+        """Картинка с большой стороной отклоняется по заголовку."""
+        response = self.upload()
+        self.assertFormError(
+            response, 'form', 'image',
+            'Сторона картинки больше 4 пикселей.')
+        self.assertFalse(Post.objects.exists())
+
+    def test_strip_metadata(self):
+        """Пересохраненная картинка не содержит EXIF."""
+        exif = Image.Exif()
+        exif[0x010F] = 'Камера'
+        post = Post.objects.create(
+            author=self.user, text='Текст', image=self.jpeg(exif=exif))
+        with Image.open(post.image.path) as image:
+            self.assertIn('exif', image.info)
+        self.assertTrue(strip_metadata(post.pk))
+        post.refresh_from_db()
+        with Image.open(post.image.path) as image:
+            self.assertNotIn('exif', image.info)
+            self.assertEqual(image.size, (8, 6))
+
+    def test_strip_metadata_skips_clean_image(self):
+        """Картинка без метаданных не пересохраняется."""
+        post = Post.objects.create(
+            author=self.user, text='Текст', image=self.jpeg())
+        name = post.image.name
+        self.assertFalse(strip_metadata(post.pk))
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, name)
+
+    def test_strip_metadata_removes_jpeg_xmp(self):
+        """XMP в блоке APP1 JPEG тоже считается метаданными."""
+        data = self.jpeg().read()
+        xmp = b'http://ns.adobe.com/xap/1.0/\x00<x:xmpmeta/>'
+        segment = b'\xff\xe1' + (len(xmp) + 2).to_bytes(2, 'big') + xmp
+        image = SimpleUploadedFile(
+            'photo.jpg', data[:2] + segment + data[2:], 'image/jpeg')
+        post = Post.objects.create(author=self.user, text='Текст', image=image)
+        self.assertTrue(strip_metadata(post.pk))
+        post.refresh_from_db()
+        with post.image.open('rb'):
+            self.assertNotIn(b'ns.adobe.com/xap', post.image.read())
+
+    def test_strip_metadata_invalidates_feeds(self):
+        """После замены файла закешированные ленты поста устаревают."""
+        info = PngImagePlugin.PngInfo()
+        info.add_text('Author', 'Автор')
+        image = self.png(Image.new('RGB', (8, 6)), pnginfo=info)
+        post = Post.objects.create(author=self.user, text='Текст', image=image)
+        scopes = (('index',), ('post', post.pk), ('profile', self.user.pk))
+        before = feed_versions(*scopes)
+        self.assertTrue(strip_metadata(post.pk))
+        after = feed_versions(*scopes)
+        for scope, old, new in zip(scopes, before, after):
+            with self.subTest(scope=scope):
+                self.assertNotEqual(old, new)
+
+    def png(self, image, **options):
+        buffer = BytesIO()
+        image.save(buffer, 'PNG', **options)
+        return SimpleUploadedFile('image.png', buffer.getvalue(), 'image/png')
+
+    def test_strip_metadata_keeps_transparency(self):
+        """Прозрачность палитры переживает пересохранение, текст нет."""
+        info = PngImagePlugin.PngInfo()
+        info.add_text('Author', 'Автор')
+        image = self.png(Image.new('P', (8, 6)), transparency=0, pnginfo=info)
+        post = Post.objects.create(author=self.user, text='Текст', image=image)
+        self.assertTrue(strip_metadata(post.pk))
+        post.refresh_from_db()
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.info.get('transparency'), 0)
+            self.assertNotIn('Author', image.info)
+
+    def test_strip_metadata_skips_animation(self):
+        """Анимированная картинка не пересохраняется в один кадр."""
+        frames = [Image.new('RGB', (8, 6), color) for color in ('red', 'blue')]
+        image = self.png(frames[0], save_all=True, append_images=frames[1:])
+        post = Post.objects.create(author=self.user, text='Текст', image=image)
+        self.assertFalse(strip_metadata(post.pk))
+        post.refresh_from_db()
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.n_frames, 2)
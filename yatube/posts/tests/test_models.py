@@ -1,6 +1,6 @@
 from django.test import TestCase
 
-from posts.models import Group, Post, User
+from posts.models import Comment, Follow, Group, Post, User
 
 
 class PostModelTest(TestCase):
@@ -49,3 +49,51 @@ class PostModelTest(TestCase):
             with self.subTest(field=field):
                 self.assertEqual(
                     post._meta.get_field(field).help_text, expected_value)
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Автор')
+        cls.reader = User.objects.create_user(username='Читатель')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.other_group = Group.objects.create(title='Другая', slug='other')
+
+    def assertCounters(self, obj, **expected):
+        obj.refresh_from_db()
+        for field, value in expected.items():
+            with self.subTest(field=field):
+                self.assertEqual(getattr(obj, field), value)
+
+    def test_post_counters(self):
+        """Счетчики постов автора и группы меняются вместе с постами."""
+        post = Post.objects.create(
+            author=self.author, group=self.group, text='Текст')
+        self.assertCounters(self.author.stats, posts_count=1)
+        self.assertCounters(self.group, posts_count=1)
+        post.group = self.other_group
+        post.save()
+        self.assertCounters(self.group, posts_count=0)
+        self.assertCounters(self.other_group, posts_count=1)
+        post.delete()
+        self.assertCounters(self.author.stats, posts_count=0)
+        self.assertCounters(self.other_group, posts_count=0)
+
+    def test_comment_counter(self):
+        """Счетчик комментариев поста меняется вместе с комментариями."""
+        post = Post.objects.create(author=self.author, text='Текст')
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Комментарий')
+        self.assertCounters(post, comments_count=1)
+        comment.delete()
+        self.assertCounters(post, comments_count=0)
+
+    def test_follow_counters(self):
+        """Счетчики подписчиков и подписок меняются вместе с подписками."""
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertCounters(self.author.stats, followers_count=1)
+        self.assertCounters(self.reader.stats, following_count=1)
+        follow.delete()
+        self.assertCounters(self.author.stats, followers_count=0)
+        self.assertCounters(self.reader.stats, following_count=0)
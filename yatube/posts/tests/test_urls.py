@@ -1,8 +1,10 @@
 from http import HTTPStatus
 
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.test import TestCase
 
 from posts.models import Group, Post, User
+from posts.tests.utils import QueryBudgetClient
 
 
 class PostsURLTests(TestCase):
@@ -22,9 +24,10 @@ class PostsURLTests(TestCase):
         )
 
     def setUp(self):
-        self.guest_client = Client()
-        self.authorized_client = Client()
-        self.authorized_author_client = Client()
+        cache.clear()
+        self.guest_client = QueryBudgetClient()
+        self.authorized_client = QueryBudgetClient()
+        self.authorized_author_client = QueryBudgetClient()
         self.authorized_client.force_login(self.user)
         self.authorized_author_client.force_login(self.author)
 
@@ -34,6 +37,8 @@ class PostsURLTests(TestCase):
                      f'/group/{self.group.slug}/': HTTPStatus.OK,
                      f'/profile/{self.author.username}/': HTTPStatus.OK,
                      f'/posts/{self.post.pk}/': HTTPStatus.OK,
+                     f'/posts/{self.post.pk}/comments/': HTTPStatus.OK,
+                     '/posts/0/comments/': HTTPStatus.NOT_FOUND,
                      '/unexisting_page/': HTTPStatus.NOT_FOUND, }
         for adress, status in urls_list.items():
             with self.subTest(adress=adress):
@@ -105,6 +110,7 @@ class PostsURLTests(TestCase):
             f'/group/{self.group.slug}/': 'posts/group_list.html',
             f'/profile/{self.user.username}/': 'posts/profile.html',
             f'/posts/{self.post.pk}/': 'posts/post_detail.html',
+            '/search/': 'posts/search.html',
         }
         for address, template in templates_url_names.items():
             with self.subTest(address=address):
@@ -1,16 +1,39 @@
+import os
 import shutil
+import sqlite3
 import tempfile
+import threading
 from http import HTTPStatus
+from unittest import mock
 
 from django import forms
 from django.conf import settings
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase, override_settings
+from django.db import IntegrityError, connection, connections, transaction
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from posts.models import Follow, Group, Post, User
+from posts import thumbnails
+from posts.follows import follow, following_ids, unfollow
+from posts.models import Comment, Follow, Group, Post, User
+from posts.pagecache import page_cache_key
+from posts.paginator import NEXT, encode_cursor
+from posts.templatetags.post_urls import route
+from posts.tests.utils import QueryBudgetClient
+from posts.thumbnails import generate
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
@@ -24,17 +47,9 @@ class PostsViewsTests(TestCase):
             title='Тестовый заголовок',
             slug='1234'
         )
-        small_gif = (
-            b'\x47\x49\x46\x38\x39\x61\x02\x00'
-            b'\x01\x00\x80\x00\x00\x00\x00\x00'
-            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
-            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
-            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
-            b'\x0A\x00\x3B'
-        )
         cls.uploaded = SimpleUploadedFile(
             name='small.gif',
-            content=small_gif,
+            content=SMALL_GIF,
             content_type='image/gif'
         )
         cls.post = Post.objects.create(
@@ -50,8 +65,9 @@ class PostsViewsTests(TestCase):
         shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
 
     def setUp(self):
-        self.authorized_client = Client()
-        self.authorized_author_client = Client()
+        cache.clear()
+        self.authorized_client = QueryBudgetClient()
+        self.authorized_author_client = QueryBudgetClient()
         self.authorized_client.force_login(self.user)
         self.authorized_author_client.force_login(self.author)
 
@@ -177,7 +193,8 @@ class PaginatorViewsTest(TestCase):
             )
 
     def setUp(self):
-        self.guest_client = Client()
+        cache.clear()
+        self.guest_client = QueryBudgetClient()
 
     def test_first_page_contains_ten_records(self):
         """
@@ -211,10 +228,137 @@ class PaginatorViewsTest(TestCase):
                 response = self.guest_client.get(url + '?page=2')
                 self.assertEqual(len(response.context['page_obj']), 3)
 
+    def test_cursor_pages(self):
+        """
+        Проверка: курсоры ведут на следующую и предыдущую страницы.
+        """
+        url_names_for_paginator = [
+            reverse('posts:index_posts'),
+            reverse('posts:group',
+                    kwargs={'slug': self.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': self.author.username}),
+        ]
+        for url in url_names_for_paginator:
+            with self.subTest(url=url):
+                first_page = self.guest_client.get(url).context['page_obj']
+                response = self.guest_client.get(
+                    url, {'cursor': first_page.paginator.next_cursor})
+                second_page = response.context['page_obj']
+                self.assertEqual(len(second_page), 3)
+                self.assertFalse(second_page.has_next())
+                response = self.guest_client.get(
+                    url, {'cursor': second_page.paginator.previous_cursor})
+                self.assertEqual(
+                    list(response.context['page_obj']), list(first_page))
+
+    def test_cursor_page_does_not_count(self):
+        """Проверка: страница по курсору не выполняет COUNT(*)."""
+        url = reverse('posts:index_posts')
+        first_page = self.guest_client.get(url).context['page_obj']
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(
+                url, {'cursor': first_page.paginator.next_cursor})
+        for query in queries.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'])
+
+    def test_broken_cursor_shows_first_page(self):
+        """Проверка: испорченный курсор открывает первую страницу."""
+        response = self.guest_client.get(
+            reverse('posts:index_posts'), {'cursor': 'испорчен'})
+        self.assertEqual(len(response.context['page_obj']), 10)
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_huge_page_number_shows_first_page(self):
+        """Проверка: номер страницы за пределами OFFSET базы открывает
+        первую страницу.
+        """
+        response = self.guest_client.get(
+            reverse('posts:index_posts'), {'page': '9' * 21})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(len(response.context['page_obj']), 10)
+        self.assertEqual(response.context['page_obj'].number, 1)
+
+    def test_cursor_of_wrong_type_shows_first_page(self):
+        """Проверка: курсор с числом вместо даты открывает первую
+        страницу, а не ломает запрос.
+        """
+        cursor = encode_cursor(NEXT, 1.5, self.post.pk)
+        urls = [
+            reverse('posts:index_posts'),
+            reverse('posts:group', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': self.author.username}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:post_comments', kwargs={'post_id': self.post.pk}),
+            reverse('api:index'),
+            reverse('api:post_comments', kwargs={'post_id': self.post.pk}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url, {'cursor': cursor})
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+        cache.clear()
+        response = self.guest_client.get(
+            reverse('posts:index_posts'), {'cursor': cursor})
+        self.assertEqual(len(response.context['page_obj']), 10)
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+
+class QueryCountViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Читатель')
+        authors = [
+            User.objects.create_user(username=f'Автор_{i}')
+            for i in range(5)
+        ]
+        groups = [
+            Group.objects.create(title=f'Группа {i}', slug=f'group-{i}')
+            for i in range(3)
+        ]
+        for i in range(12):
+            cls.post = Post.objects.create(
+                author=authors[i % 5],
+                group=groups[i % 3],
+                text='Тестовый текст' + str(i),
+            )
+        for author in authors:
+            Follow.objects.create(user=cls.user, author=author)
+            Comment.objects.create(
+                post=cls.post, author=author, text='Комментарий')
+        cls.group = groups[0]
+        cls.author = authors[0]
+
+    def setUp(self):
+        self.authorized_client = QueryBudgetClient()
+        self.authorized_client.force_login(self.user)
+
+    def test_pages_do_not_query_per_post(self):
+        """
+        Проверка: число запросов не зависит от числа постов и комментариев.
+        """
+        expected_queries = {
+            reverse('posts:index_posts'): 3,
+            reverse('posts:follow_index'): 4,
+            reverse('posts:group',
+                    kwargs={'slug': self.group.slug}): 4,
+            reverse('posts:profile',
+                    kwargs={'username': self.author.username}): 5,
+            reverse('posts:post_detail',
+                    kwargs={'post_id': self.post.pk}): 4,
+        }
+        for url, count in expected_queries.items():
+            with self.subTest(url=url):
+                cache.clear()
+                with self.assertNumQueries(count):
+                    self.authorized_client.get(url)
+
 
 class ErrorViewsTests(TestCase):
     def setUp(self):
-        self.guest_client = Client()
+        self.guest_client = QueryBudgetClient()
 
     def test_error_page(self):
         response = self.guest_client.get('nonexist-page')
@@ -245,10 +389,11 @@ class FollowViewsTests(TestCase):
         )
 
     def setUp(self):
-        self.author_client = Client()
-        self.follower = Client()
-        self.not_follower = Client()
-        self.future_follower = Client()
+        cache.clear()
+        self.author_client = QueryBudgetClient()
+        self.follower = QueryBudgetClient()
+        self.not_follower = QueryBudgetClient()
+        self.future_follower = QueryBudgetClient()
         self.author_client.force_login(self.author)
         self.follower.force_login(self.user)
         self.not_follower.force_login(self.second_user)
@@ -327,3 +472,557 @@ class FollowViewsTests(TestCase):
         author_posts_count = len(author_posts)
         self.assertNotEqual(len(
             response.context['page_obj']), author_posts_count)
+
+    def test_repeated_follow_and_unfollow_are_idempotent(self):
+        """Повторные подписка и отписка ничего не меняют."""
+        url = reverse('posts:profile_follow', kwargs={'username': self.author})
+        for _ in range(2):
+            self.not_follower.post(url)
+        self.assertEqual(Follow.objects.filter(
+            user=self.second_user, author=self.author).count(), 1)
+        self.author.stats.refresh_from_db()
+        self.assertEqual(self.author.stats.followers_count, 2)
+        url = reverse(
+            'posts:profile_unfollow', kwargs={'username': self.author})
+        for _ in range(2):
+            self.not_follower.post(url)
+        self.author.stats.refresh_from_db()
+        self.assertEqual(self.author.stats.followers_count, 1)
+
+    def test_duplicate_follow_rejected(self):
+        """Дубль подписки не пройдет ограничение уникальности."""
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(author=self.author, user=self.user)
+
+    def test_follow_to_missing_user(self):
+        """Подписка на несуществующего пользователя - 404."""
+        response = self.follower.post(reverse(
+            'posts:profile_follow', kwargs={'username': 'nobody'}))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_following_ids_cached(self):
+        """Подписки пользователя читаются из кеша до первой перемены."""
+        self.assertEqual(following_ids(self.user.pk), {self.author.pk})
+        with self.assertNumQueries(0):
+            following_ids(self.user.pk)
+        follow(self.user.pk, self.second_user.pk)
+        self.assertEqual(following_ids(self.user.pk),
+                         {self.author.pk, self.second_user.pk})
+        unfollow(self.user.pk, self.author.pk)
+        self.assertEqual(following_ids(self.user.pk), {self.second_user.pk})
+
+    def test_profile_follow_state(self):
+        """Кнопка подписки в профиле верна и не стоит запроса к Follow."""
+        url = reverse('posts:profile', kwargs={'username': self.author})
+        following_ids(self.user.pk)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.follower.get(url)
+        self.assertTrue(response.context['following'])
+        self.assertFalse(any(
+            'posts_follow' in query['sql'] for query in queries))
+        self.assertFalse(
+            self.not_follower.get(url).context['following'])
+
+
+class TimelineViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Автор')
+        cls.user = User.objects.create_user(username='Подписчик')
+        cls.old_post = Post.objects.create(
+            author=cls.author, text='Пост до подписки')
+        Follow.objects.create(author=cls.author, user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.follower = QueryBudgetClient()
+        self.follower.force_login(self.user)
+
+    def feed(self, **params):
+        response = self.follower.get(reverse('posts:follow_index'), params)
+        return list(response.context['page_obj'])
+
+    def test_follow_and_new_posts_fill_timeline(self):
+        """Подписка и новый пост раскладываются в ленту подписчика."""
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertEqual(
+            list(self.user.timeline.values_list('post', flat=True)),
+            [self.old_post.pk, post.pk]
+        )
+        self.assertEqual(self.feed(), [post, self.old_post])
+
+    def test_unfollow_clears_timeline(self):
+        """После отписки посты автора уходят из ленты."""
+        Follow.objects.filter(user=self.user).delete()
+        self.assertFalse(self.user.timeline.exists())
+        self.assertEqual(self.feed(), [])
+
+    def test_timeline_cursor_pages(self):
+        """Лента подписок листается курсором без пропусков и повторов."""
+        for i in range(14):
+            Post.objects.create(author=self.author, text=f'Пост {i}')
+        response = self.follower.get(reverse('posts:follow_index'))
+        first = list(response.context['page_obj'])
+        second = self.feed(
+            cursor=response.context['page_obj'].paginator.next_cursor)
+        self.assertEqual(len(first), 10)
+        self.assertEqual(
+            first + second,
+            list(Post.objects.filter(author=self.author)
+                 .order_by('-pub_date', '-pk'))
+        )
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_popular_author_read_on_demand(self):
+        """Посты популярного автора не раскладываются, но видны в ленте."""
+        Follow.objects.filter(user=self.user).delete()
+        Follow.objects.create(author=self.author, user=self.user)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertFalse(
+            self.user.timeline.filter(post=post).exists())
+        self.assertEqual(self.feed(), [post, self.old_post])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=2, TIMELINE_FANOUT_HYSTERESIS=1)
+    def test_fanout_resumes_below_limit(self):
+        """Раскладка включается снова не на пороге, а ниже него, и тогда
+        в ленты попадают пропущенные посты.
+        """
+        others = [User.objects.create_user(username=f'Читатель {i}')
+                  for i in range(2)]
+        for other in others:
+            Follow.objects.create(author=self.author, user=other)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertFalse(self.user.timeline.filter(post=post).exists())
+        Follow.objects.filter(user=others[0]).delete()
+        self.assertFalse(self.user.timeline.filter(post=post).exists())
+        self.assertEqual(self.feed(), [post, self.old_post])
+        Follow.objects.filter(user=others[1]).delete()
+        self.assertTrue(self.user.timeline.filter(post=post).exists())
+        self.assertEqual(self.feed(), [post, self.old_post])
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Автор')
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = QueryBudgetClient()
+
+    def test_page_renders_prepared_thumbnail(self):
+        """Страница берет адрес готовой миниатюры из поста."""
+        url = generate(self.post.pk)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.thumbnail_url, url)
+        response = self.client.get(reverse('posts:index_posts'))
+        self.assertContains(response, f'src="{url}"')
+
+    def test_page_without_thumbnail_shows_image(self):
+        """Пока миниатюры нет, показывается исходная картинка."""
+        response = self.client.get(reverse('posts:index_posts'))
+        self.assertContains(response, f'src="{self.post.image.url}"')
+
+    def test_new_image_resets_thumbnail(self):
+        """Новая картинка сбрасывает миниатюру старой."""
+        generate(self.post.pk)
+        self.post.refresh_from_db()
+        self.post.image = SimpleUploadedFile(
+            'other.gif', SMALL_GIF, 'image/gif')
+        self.post.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.thumbnail_url, '')
+
+
+class PoolRouter:
+    """Отправляет все запросы в копию тестовой базы на файле."""
+
+    def db_for_read(self, model, **hints):
+        return 'pool'
+
+    db_for_write = db_for_read
+
+
+@override_settings(DATABASE_ROUTERS=[PoolRouter()])
+class FileDatabaseTests(SimpleTestCase):
+    """Тесты с потоками на копии тестовой базы в файле, как в работе:
+    общую базу SQLite в памяти другой поток застает заблокированной и
+    не ждет ее.
+    """
+
+    databases = {'default'}
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'pool.sqlite3')
+        connection.ensure_connection()
+        copy = sqlite3.connect(path)
+        connection.connection.backup(copy)
+        copy.close()
+        connections.databases['pool'] = {
+            **settings.DATABASES['default'], 'NAME': path}
+        self.addCleanup(connections.databases.pop, 'pool')
+        self.addCleanup(self.close)
+
+    def close(self):
+        connections['pool'].close()
+        del connections['pool']
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=2)
+class ThumbnailPoolTests(FileDatabaseTests):
+    """Картинки обрабатываются в пуле потоков."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_image_processed_in_pool(self):
+        """Картинка нового поста обрабатывается в потоке пула."""
+        threads = []
+
+        def process(post_id):
+            threads.append(threading.current_thread().name)
+            return original(post_id)
+
+        original = thumbnails.process
+        author = User.objects.create_user(username='Автор')
+        with mock.patch.object(thumbnails, 'process', process):
+            post = Post.objects.create(
+                author=author, text='Пост с картинкой',
+                image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'))
+            thumbnails.shutdown()
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnail_url)
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith('thumbnails'))
+
+
+@override_settings(READ_CONCURRENCY=2)
+class ConcurrentLoadsTests(FileDatabaseTests):
+    def test_post_detail_loads_comments_in_pool(self):
+        """Пост и комментарии загружаются одновременно, обертки
+        запросов переходят в поток пула.
+        """
+        author = User.objects.create_user(username='Автор')
+        post = Post.objects.create(author=author, text='Пост')
+        Comment.objects.create(post=post, author=author, text='Комментарий')
+        threads = set()
+
+        def record(execute, sql, params, many, context):
+            if 'posts_comment' in sql:
+                threads.add(threading.current_thread().name)
+            return execute(sql, params, many, context)
+
+        url = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        with connections['pool'].execute_wrapper(record):
+            response = self.client.get(url)
+        self.assertContains(response, 'Комментарий')
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads.pop().startswith('loads'))
+
+
+class SearchViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Автор')
+        cls.rare = Post.objects.create(
+            author=cls.author, text='Про котов и немного про собак')
+        cls.often = Post.objects.create(
+            author=cls.author, text='Коты, коты и еще раз Коты')
+        cls.other = Post.objects.create(
+            author=cls.author, text='Совсем другая запись')
+
+    def setUp(self):
+        self.client = QueryBudgetClient()
+
+    def search(self, query, **params):
+        response = self.client.get(
+            reverse('posts:search'), {'q': query, **params})
+        return list(response.context['page_obj'])
+
+    def test_search_ranks_matches(self):
+        """Поиск находит посты по префиксу слова, лучшие совпадения выше."""
+        self.assertEqual(self.search('кот'), [self.often, self.rare])
+
+    def test_index_follows_post_changes(self):
+        """Индекс следует за изменением и удалением постов."""
+        Post.objects.filter(pk=self.other.pk).update(text='Тоже про котов')
+        self.assertIn(self.other, self.search('котов'))
+        self.other.delete()
+        self.assertNotIn(self.other, self.search('котов'))
+
+    def test_search_syntax_is_escaped(self):
+        """Операторы FTS5 во вводе не ломают запрос."""
+        self.assertEqual(self.search('"коты" OR (NEAR'), [])
+        self.assertEqual(self.search('***'), [])
+
+    def test_search_cursor_pages(self):
+        """Результаты листаются курсором, запрос сохраняется в ссылках."""
+        for i in range(12):
+            Post.objects.create(author=self.author, text=f'Собаки {i}')
+        response = self.client.get(reverse('posts:search'), {'q': 'собак'})
+        first = list(response.context['page_obj'])
+        cursor = response.context['page_obj'].paginator.next_cursor
+        self.assertContains(response, f'?q=%D1%81%D0%BE%D0%B1%D0%B0%D0%BA'
+                                      f'&cursor={cursor}')
+        second = self.search('собак', cursor=cursor)
+        self.assertEqual(len(first), 10)
+        self.assertEqual(len(set(first + second)), 13)
+
+    def test_search_date_cursor_shows_first_page(self):
+        """Курсор с датой вместо релевантности открывает первую
+        страницу поиска.
+        """
+        cursor = encode_cursor(NEXT, self.rare.pub_date, self.rare.pk)
+        self.assertEqual(
+            self.search('кот', cursor=cursor), [self.often, self.rare])
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идет через тот же индекс."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'кот'})
+        self.assertEqual(
+            set(response.context['cl'].queryset), {self.often, self.rare})
+
+
+class ConditionalViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Автор')
+        cls.user = User.objects.create_user(username='Читатель')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client = QueryBudgetClient()
+        self.urls = [
+            reverse('posts:index_posts'),
+            reverse('posts:group', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': self.author.username}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ]
+
+    def test_unchanged_page_is_not_modified(self):
+        """Неизменная страница отдается ответом 304 без запроса ленты."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertFalse(response.has_header('Last-Modified'))
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.NOT_MODIFIED)
+                self.assertLessEqual(len(queries), 1)
+
+    def test_changes_invalidate_etag(self):
+        """Новый пост, правка и комментарий меняют ETag страниц."""
+        etags = [self.client.get(url)['ETag'] for url in self.urls]
+        Post.objects.create(
+            author=self.author, group=self.group, text='Новый пост')
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        for url, etag in zip(self.urls, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+        url = self.urls[-1]
+        etag = self.client.get(url)['ETag']
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_etag_depends_on_user(self):
+        """Страница другого пользователя не считается той же."""
+        etag = self.client.get(self.urls[0])['ETag']
+        self.client.force_login(self.user)
+        response = self.client.get(self.urls[0], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_follow_changes_profile_etag(self):
+        """Подписка меняет ETag профиля автора для подписчика."""
+        self.client.force_login(self.user)
+        etag = self.client.get(self.urls[2])['ETag']
+        Follow.objects.create(user=self.user, author=self.author)
+        response = self.client.get(self.urls[2], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_follow_changes_profile_for_anonymous(self):
+        """Подписка меняет ETag и кешированную страницу профиля автора
+        для анонимов: на ней выведено число подписчиков.
+        """
+        etag = self.client.get(self.urls[2])['ETag']
+        Follow.objects.create(user=self.user, author=self.author)
+        response = self.client.get(self.urls[2], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'Подписчиков: 1')
+        Follow.objects.filter(user=self.user, author=self.author).delete()
+        self.assertContains(self.client.get(self.urls[2]), 'Подписчиков: 0')
+
+
+class CommentsViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Автор')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        cls.comments = [
+            Comment.objects.create(
+                post=cls.post, author=cls.author, text=f'Комментарий {i}')
+            for i in range(25)
+        ]
+
+    def setUp(self):
+        self.client = QueryBudgetClient()
+
+    def test_comments_are_paginated(self):
+        """На странице поста первые комментарии, остальные - кусочком."""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}))
+        first = list(response.context['comments'])
+        self.assertEqual(first, self.comments[:20])
+        cursor = response.context['comments'].paginator.next_cursor
+        fragment_url = reverse(
+            'posts:post_comments', kwargs={'post_id': self.post.pk})
+        self.assertContains(response, f'{fragment_url}?cursor={cursor}')
+        response = self.client.get(fragment_url, {'cursor': cursor})
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertEqual(list(response.context['comments']),
+                         self.comments[20:])
+        self.assertIsNone(response.context['comments'].paginator.next_cursor)
+
+
+class RateLimitViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Спамер')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = QueryBudgetClient()
+        self.authorized_client.force_login(self.user)
+
+    def test_comment_burst_is_throttled(self):
+        """Частые комментарии получают 429 с Retry-After."""
+        url = reverse('posts:add_comment', kwargs={'post_id': self.post.pk})
+        statuses = [
+            self.authorized_client.post(url, {'text': 'Спам'}).status_code
+            for _ in range(21)
+        ]
+        self.assertEqual(statuses, [HTTPStatus.FOUND] * 20
+                         + [HTTPStatus.TOO_MANY_REQUESTS])
+        response = self.authorized_client.post(url, {'text': 'Спам'})
+        self.assertTrue(int(response['Retry-After']) > 0)
+        self.assertEqual(Comment.objects.count(), 20)
+        response = self.authorized_client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+
+class RouteFilterTests(TestCase):
+    def test_matches_reverse(self):
+        """Фильтр route дает тот же адрес, что и reverse()."""
+        cases = [
+            ('posts:profile', 'Лев Толстой'),
+            ('posts:group', 'some-group'),
+            ('posts:post_detail', 42),
+        ]
+        for name, value in cases:
+            with self.subTest(name=name):
+                self.assertEqual(
+                    route(value, name), reverse(name, args=[value]))
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Автор')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.urls = [
+            reverse('posts:index_posts'),
+            reverse('posts:group', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': self.author.username}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ]
+
+    def test_anonymous_page_served_from_cache(self):
+        """Повторный анонимный запрос не ходит в базу."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                content = self.client.get(url).content
+                with self.assertNumQueries(0):
+                    response = self.client.get(url)
+                self.assertEqual(response.content, content)
+
+    def test_new_post_refreshes_page(self):
+        """Новый пост сразу виден на закешированных страницах."""
+        for url in self.urls[:3]:
+            self.client.get(url)
+        Post.objects.create(
+            author=self.author, group=self.group, text='Новый пост')
+        for url in self.urls[:3]:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Новый пост')
+
+    def test_stale_copy_served_during_regeneration(self):
+        """Пока страницу перерисовывает другой процесс, отдается старая
+        копия.
+        """
+        url = self.urls[0]
+        self.client.get(url)
+        Post.objects.create(author=self.author, text='Новый пост')
+        lock_key = f'{page_cache_key(RequestFactory().get(url))}:lock'
+        cache.add(lock_key, 1)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertNotContains(response, 'Новый пост')
+        cache.delete(lock_key)
+        self.assertContains(self.client.get(url), 'Новый пост')
+
+    def test_authenticated_pages_not_cached(self):
+        """Страницы для вошедших пользователей всегда рисуются заново."""
+        self.client.get(self.urls[0])
+        self.client.force_login(self.author)
+        response = self.client.get(self.urls[0])
+        self.assertTemplateUsed(response, 'posts/index.html')
+        self.assertContains(response, 'Новая запись')
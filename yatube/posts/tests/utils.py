@@ -0,0 +1,28 @@
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+QUERY_BUDGET = 8
+
+
+def counted(query):
+    return not query['sql'].startswith(('SAVEPOINT', 'RELEASE SAVEPOINT'))
+
+
+class QueryBudgetClient(Client):
+    """Клиент, который валит тест, если вьюха выполнила больше
+    QUERY_BUDGET SQL-запросов за один HTTP-запрос.
+    """
+
+    def request(self, **request):
+        with CaptureQueriesContext(connection) as queries:
+            response = super().request(**request)
+        counted_queries = [
+            query['sql'] for query in queries if counted(query)]
+        if len(counted_queries) > QUERY_BUDGET:
+            raise AssertionError(
+                f'{request["PATH_INFO"]}: {len(counted_queries)} '
+                f'SQL-запросов при бюджете {QUERY_BUDGET}:\n'
+                + '\n'.join(counted_queries)
+            )
+        return response
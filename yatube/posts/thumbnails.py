@@ -0,0 +1,88 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from sorl.thumbnail import get_thumbnail
+
+from core.instrumentation import measure
+
+from .feeds import bump_post_feeds
+from .images import strip_metadata
+from .models import Post
+
+GEOMETRY = '960x339'
+OPTIONS = {'crop': 'center', 'upscale': True}
+
+logger = logging.getLogger(__name__)
+_executor = None
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails',
+        )
+    return _executor
+
+
+def shutdown():
+    """Дожидается картинок, уже отданных пулу, и останавливает его.
+
+    Следующая картинка запустит новый пул.
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+
+def generate(post_id):
+    """Готовит миниатюру картинки поста и сохраняет ее адрес в посте."""
+    post = Post.objects.filter(pk=post_id).only(
+        'image', 'author', 'group').first()
+    if post is None or not post.image:
+        return None
+    url = get_thumbnail(post.image, GEOMETRY, **OPTIONS).url
+    # Пока миниатюра готовилась, картинку могли заменить.
+    if Post.objects.filter(pk=post_id, image=post.image.name).update(
+            thumbnail_url=url):
+        bump_post_feeds(post)
+    return url
+
+
+def process(post_id):
+    """Срезает метаданные картинки поста и готовит ее миниатюру."""
+    with measure('thumbnail'):
+        strip_metadata(post_id)
+        return generate(post_id)
+
+
+def _process_logged(post_id):
+    try:
+        process(post_id)
+    except Exception:
+        logger.exception('Не удалось обработать картинку поста %s', post_id)
+
+
+def _work(post_id):
+    try:
+        _process_logged(post_id)
+    finally:
+        close_old_connections()
+
+
+def _submit(post_id):
+    if settings.THUMBNAIL_WORKERS:
+        executor().submit(_work, post_id)
+    else:
+        _process_logged(post_id)
+
+
+def schedule(post):
+    """Ставит картинку в очередь, когда пост будет закоммичен."""
+    if post.image:
+        transaction.on_commit(partial(_submit, post.pk))
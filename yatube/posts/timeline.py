@@ -0,0 +1,136 @@
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .models import Follow, Post, TimelineEntry, UserStats
+
+ENTRY_FIELDS = ('user_id', 'author_id', 'post_id', 'pub_date')
+FOLLOW_ENTRY_FIELDS = (
+    'user_id', 'author_id', 'author__posts__id', 'author__posts__pub_date')
+
+
+def _fan_out_follows(**lookups):
+    """Подписки, по которым посты раскладываются в ленты при записи."""
+    return Follow.objects.filter(
+        author__stats__timeline_fanout=True, **lookups)
+
+
+def _insert_from(follows):
+    """Раскладывает посты по подпискам одним INSERT ... SELECT.
+
+    Строки ленты собираются в базе, а не в Python: запись поста или
+    подписки стоит одного запроса при любом числе подписчиков.
+    """
+    if not settings.TIMELINE_ENABLED:
+        return
+    select, params = follows.order_by().values_list(
+        *FOLLOW_ENTRY_FIELDS).query.sql_with_params()
+    ops = connection.ops
+    columns = ', '.join(map(ops.quote_name, ENTRY_FIELDS))
+    sql = (
+        f'{ops.insert_statement(ignore_conflicts=True)} '
+        f'{ops.quote_name(TimelineEntry._meta.db_table)} ({columns}) '
+        f'{select}{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def fan_out(post):
+    """Раскладывает новый пост в ленты подписчиков автора."""
+    _insert_from(_fan_out_follows(
+        author_id=post.author_id, author__posts=post.pk))
+
+
+def fan_out_since(post_id, author_ids):
+    """Раскладывает посты авторов с id больше post_id, например
+    созданные bulk_create без сигналов.
+    """
+    _insert_from(_fan_out_follows(
+        author__in=author_ids, author__posts__pk__gt=post_id))
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту пользователя все посты автора."""
+    _insert_from(_fan_out_follows(user_id=user_id, author_id=author_id))
+
+
+def pause_fanout(author_id):
+    """Перестает раскладывать посты автора, у которого подписчиков
+    стало больше TIMELINE_FANOUT_LIMIT.
+    """
+    UserStats.objects.filter(
+        user_id=author_id, timeline_fanout=True,
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+    ).update(timeline_fanout=False)
+
+
+def resume_fanout(author_id):
+    """Снова раскладывает посты автора, когда подписчиков стало на
+    TIMELINE_FANOUT_HYSTERESIS меньше порога.
+
+    Зазор нужен, чтобы подписка и отписка на самом пороге не
+    раскладывали все посты автора по лентам всех подписчиков каждый раз.
+    """
+    resume_at = (settings.TIMELINE_FANOUT_LIMIT
+                 - settings.TIMELINE_FANOUT_HYSTERESIS)
+    resumed = UserStats.objects.filter(
+        user_id=author_id, timeline_fanout=False,
+        followers_count__lte=resume_at,
+    ).update(timeline_fanout=True)
+    if resumed:
+        # В лентах нет постов, вышедших без раскладки, и подписок за это
+        # время.
+        _insert_from(Follow.objects.filter(author_id=author_id))
+
+
+def sync_fanout():
+    """Выставляет признак раскладки всем авторам по их подписчикам."""
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    UserStats.objects.filter(followers_count__gt=limit).update(
+        timeline_fanout=False)
+    UserStats.objects.filter(
+        followers_count__lte=limit - settings.TIMELINE_FANOUT_HYSTERESIS,
+    ).update(timeline_fanout=True)
+
+
+def remove(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def rebuild(users=None):
+    """Собирает ленты подписок заново по таблице подписок."""
+    if users is None:
+        sync_fanout()
+    entries = TimelineEntry.objects.all()
+    follows = _fan_out_follows()
+    if users is not None:
+        entries = entries.filter(user__in=users)
+        follows = follows.filter(user__in=users)
+    entries.delete()
+    _insert_from(follows)
+    return TimelineEntry.objects.count()
+
+
+def timeline_posts(entries):
+    return [entry.post for entry in entries]
+
+
+def follow_feed(user):
+    """Queryset ленты подписок и параметры CursorPaginator для него.
+
+    Обычно это один проход по индексу TimelineEntry(user, pub_date).
+    Посты популярных авторов в ленты не раскладываются, при подписке
+    на них лента собирается из постов при чтении.
+    """
+    posts = Post.objects.select_related('author', 'group')
+    followed = user.follower.values('author')
+    if not settings.TIMELINE_ENABLED:
+        return posts.filter(author__in=followed), {}
+    popular = followed.filter(author__stats__timeline_fanout=False)
+    if popular.exists():
+        return posts.filter(
+            Q(pk__in=user.timeline.values('post')) | Q(author__in=popular)
+        ), {}
+    entries = user.timeline.select_related('post__author', 'post__group')
+    return entries, {'tiebreak': 'post_id', 'transform': timeline_posts}
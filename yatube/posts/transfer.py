@@ -0,0 +1,204 @@
+import csv
+import json
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .bulk import chunks, explicit_dates
+from .counters import recount_groups, recount_users
+from .feeds import bump_version
+from .models import Group, Post, User
+from .timeline import fan_out_since
+
+FIELDS = ('author', 'group', 'pub_date', 'text', 'image')
+FORMATS = ('jsonl', 'csv')
+# Сколько значений подставлять в один IN: у SQLite лимит параметров.
+LOOKUP_CHUNK = 500
+
+
+def guess_format(path):
+    return 'csv' if str(path).lower().endswith('.csv') else 'jsonl'
+
+
+class BrokenRecord(ValueError):
+    """Строка, которую не удалось разобрать: импорт ее пропускает."""
+
+
+def read_records(stream, fmt):
+    """Записи из потока. Вместо битой строки JSONL отдается
+    BrokenRecord, чтобы она не обрывала импорт.
+    """
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as error:
+            yield BrokenRecord(f'неверный JSON: {error}')
+
+
+def write_records(stream, fmt, records):
+    count = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(stream, FIELDS)
+        writer.writeheader()
+        write = writer.writerow
+    else:
+        def write(record):
+            stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+    for record in records:
+        write(record)
+        count += 1
+    return count
+
+
+def export_records(posts=None, chunk_size=2000):
+    """Посты построчно, с автором и группой по username и slug.
+
+    Строки читаются из курсора порциями по chunk_size, так что память
+    не растет с числом постов.
+    """
+    posts = Post.objects.all() if posts is None else posts
+    rows = posts.order_by('pk').values_list(
+        'author__username', 'group__slug', 'pub_date', 'text', 'image',
+    ).iterator(chunk_size=chunk_size)
+    for author, group, pub_date, text, image in rows:
+        yield {
+            'author': author,
+            'group': group or '',
+            'pub_date': pub_date.isoformat(),
+            'text': text,
+            'image': image,
+        }
+
+
+class Lookup:
+    """Кеш id по естественному ключу, например username или slug.
+
+    Неизвестные ключи тоже запоминаются. Кеш сбрасывается целиком,
+    когда в нем больше max_size ключей.
+    """
+
+    def __init__(self, queryset, field, max_size=100000):
+        self.queryset = queryset
+        self.field = field
+        self.max_size = max_size
+        self.ids = {}
+
+    def resolve(self, keys):
+        keys = {key for key in keys if key}
+        missing = keys - self.ids.keys()
+        if len(self.ids) + len(missing) > self.max_size:
+            self.ids.clear()
+            missing = keys
+        for chunk in chunks(missing, LOOKUP_CHUNK):
+            found = dict(self.queryset.filter(
+                **{f'{self.field}__in': chunk}
+            ).values_list(self.field, 'pk'))
+            for key in chunk:
+                self.ids[key] = found.get(key)
+
+    def __getitem__(self, key):
+        return self.ids[key]
+
+
+class Importer:
+    """Создает посты из записей пачками по batch_size через bulk_create.
+
+    Каждая пачка пишется в своей транзакции. Сигналы при bulk_create не
+    срабатывают, поэтому счетчики, ленты подписок и версии лент
+    затронутых авторов и групп обновляются в конце.
+    """
+
+    def __init__(self, batch_size=1000, log=None):
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.users = Lookup(User.objects.all(), 'username')
+        self.groups = Lookup(Group.objects.all(), 'slug')
+        self.author_ids = set()
+        self.group_ids = set()
+        self.created = 0
+        self.skipped = 0
+        self.last_pk = 0
+
+    def run(self, records):
+        # Новые посты получат id больше этого: в ленты подписок
+        # раскладываются только они.
+        self.last_pk = Post.objects.order_by('-pk').values_list(
+            'pk', flat=True).first() or 0
+        # Уже записанные пачки остаются в базе и при ошибке, так что
+        # счетчики и ленты для них обновляются в любом случае.
+        try:
+            with explicit_dates(Post._meta.get_field('pub_date')):
+                for batch in chunks(enumerate(records, 1), self.batch_size):
+                    self.import_batch(batch)
+        finally:
+            self.finish()
+        return self.created, self.skipped
+
+    def import_batch(self, batch):
+        records = [record for _, record in batch if isinstance(record, dict)]
+        self.users.resolve(record.get('author') for record in records)
+        self.groups.resolve(record.get('group') for record in records)
+        posts = []
+        for number, record in batch:
+            try:
+                posts.append(self.build(record))
+            except ValueError as error:
+                self.skipped += 1
+                self.log(f'Запись {number} пропущена: {error}')
+        with transaction.atomic():
+            Post.objects.bulk_create(posts, batch_size=self.batch_size)
+        self.created += len(posts)
+        self.author_ids.update(post.author_id for post in posts)
+        self.group_ids.update(
+            post.group_id for post in posts if post.group_id is not None)
+
+    def build(self, record):
+        if isinstance(record, BrokenRecord):
+            raise record
+        if not isinstance(record, dict):
+            raise ValueError('запись не объект')
+        text = record.get('text')
+        if not text:
+            raise ValueError('нет текста')
+        author = record.get('author')
+        author_id = self.users[author] if author else None
+        if author_id is None:
+            raise ValueError(f'нет пользователя {author!r}')
+        group = record.get('group')
+        group_id = self.groups[group] if group else None
+        if group and group_id is None:
+            raise ValueError(f'нет группы {group!r}')
+        pub_date = timezone.now()
+        if record.get('pub_date'):
+            pub_date = parse_datetime(record['pub_date'])
+            if pub_date is None:
+                raise ValueError(f'неверная дата {record["pub_date"]!r}')
+            if timezone.is_naive(pub_date):
+                pub_date = timezone.make_aware(pub_date)
+        return Post(
+            author_id=author_id,
+            group_id=group_id,
+            text=text,
+            pub_date=pub_date,
+            image=record.get('image') or '',
+        )
+
+    @transaction.atomic
+    def finish(self):
+        if not self.created:
+            return
+        recount_groups()
+        for chunk in chunks(self.author_ids, LOOKUP_CHUNK):
+            recount_users(User.objects.filter(pk__in=chunk))
+            fan_out_since(self.last_pk, chunk)
+            for author_id in chunk:
+                bump_version('profile', author_id)
+        for group_id in self.group_ids:
+            bump_version('group', group_id)
+        bump_version('index')
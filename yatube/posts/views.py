@@ -1,79 +1,143 @@
+from functools import partial
+from urllib.parse import urlencode
+
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
 
-from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from core.concurrency import gather
+from core.ratelimit import rate_limit
 
-POSTS_COUNT = 10
+from .feeds import (COMMENTS_COUNT, POSTS_COUNT, feed_context, feed_key,
+                    not_modified, set_validators)
+from .follows import follow, following_ids, unfollow
+from .forms import CommentForm, PostForm
+from .models import Comment, Group, Post, User
+from .pagecache import anonymous_page_cache
+from .paginator import paginate
+from .search import search_posts
+from .timeline import follow_feed
 
 
+@anonymous_page_cache
 def index(request):
+    key = feed_key(request, ('index',))
+    response = not_modified(request, key)
+    if response is not None:
+        return response
     template = 'posts/index.html'
     index_text = 'Последние обновления на сайте'
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, POSTS_COUNT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = Post.objects.select_related('author', 'group')
     context = {
         'index_text': index_text,
-        'page_obj': page_obj,
+        **feed_context(request, post_list, key),
     }
-    return render(request, template, context)
+    response = render(request, template, context)
+    return set_validators(request, response, key)
 
 
+@anonymous_page_cache
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
+    key = feed_key(request, ('group', group.pk))
+    response = not_modified(request, key)
+    if response is not None:
+        return response
     template = 'posts/group_list.html'
     group_text = 'Здесь будет информация о группах проекта Yatube'
-    post_list = group.posts.all()
-    paginator = Paginator(post_list, POSTS_COUNT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = group.posts.select_related('author')
     context = {
         'group_text': group_text,
         'group': group,
-        'page_obj': page_obj,
-
+        **feed_context(request, post_list, key),
     }
-    return render(request, template, context, slug)
+    response = render(request, template, context)
+    return set_validators(request, response, key)
 
 
+@anonymous_page_cache
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username)
+    scopes = [('profile', author.pk)]
+    if request.user.is_authenticated:
+        # Кнопка подписки зависит от подписок того, кто смотрит.
+        scopes.append(('follow', request.user.pk))
+    key = feed_key(request, *scopes)
+    response = not_modified(request, key)
+    if response is not None:
+        return response
     template = 'posts/profile.html'
-    post_list = author.posts.all()
-    post_count = author.posts.count()
-    paginator = Paginator(post_list, POSTS_COUNT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    following = request.user.is_authenticated and author.following.filter(
-        user=request.user).exists()
+    post_list = author.posts.select_related('group')
+    post_count = author.stats.posts_count
+    following = (request.user.is_authenticated
+                 and author.pk in following_ids(request.user.pk))
     context = {
         'author': author,
         'post_count': post_count,
-        'page_obj': page_obj,
         'following': following,
+        **feed_context(request, post_list, key),
     }
-    return render(request, template, context)
+    response = render(request, template, context)
+    return set_validators(request, response, key)
 
 
+@anonymous_page_cache
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    load_post = partial(
+        get_object_or_404,
+        Post.objects.select_related('author__stats', 'group'), id=post_id)
+    load_comments = partial(
+        paginate, request,
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        COMMENTS_COUNT, key='created')
+    if request.META.get('HTTP_IF_NONE_MATCH'):
+        # Скорее всего ответ 304, и комментарии не понадобятся.
+        post, comments = load_post(), None
+    else:
+        post, comments = gather(load_post, load_comments)
+    scopes = [('post', post.pk), ('profile', post.author_id)]
+    if post.group_id is not None:
+        scopes.append(('group', post.group_id))
+    key = feed_key(request, *scopes)
+    response = not_modified(request, key)
+    if response is not None:
+        return response
     template = 'posts/post_detail.html'
     form = CommentForm()
-    comments = post.comments.all()
+    if comments is None:
+        comments = load_comments()
+    post_count = post.author.stats.posts_count
     context = {
         'post': post,
-        'post.group': post.group,
-        'post.author': post.author,
+        'post_count': post_count,
         'form': form,
         'comments': comments,
     }
-    return render(request, template, context)
+    response = render(request, template, context)
+    return set_validators(request, response, key)
+
+
+def post_comments(request, post_id):
+    """Следующая страница комментариев поста кусочком HTML."""
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    key = feed_key(request, ('post', post_id))
+    response = not_modified(request, key)
+    if response is not None:
+        return response
+    comments = paginate(
+        request, Comment.objects.filter(post_id=post_id).select_related(
+            'author'), COMMENTS_COUNT, key='created')
+    context = {'post_id': post_id, 'comments': comments}
+    response = render(request, 'posts/includes/comments.html', context)
+    return set_validators(request, response, key)
 
 
 @login_required
+@rate_limit('post', '10/m', methods=('POST',))
+@transaction.atomic
 def post_create(request):
     form = PostForm(
         request.POST or None,
@@ -88,6 +152,7 @@ def post_create(request):
 
 
 @login_required
+@transaction.atomic
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     if post.author != request.user:
@@ -109,6 +174,8 @@ def post_edit(request, post_id):
 
 
 @login_required
+@rate_limit('comment', '20/m', methods=('POST',))
+@transaction.atomic
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -120,30 +187,41 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    context = {'query': query, 'query_string': urlencode({'q': query})}
+    if query:
+        post_list, options = search_posts(
+            query, Post.objects.select_related('author', 'group'))
+        context['page_obj'] = paginate(
+            request, post_list, POSTS_COUNT, **options)
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, POSTS_COUNT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    context = {
-        'page_obj': page_obj,
-    }
+    post_list, options = follow_feed(request.user)
+    key = feed_key(request, ('follow', request.user.pk), ('index',))
+    context = feed_context(request, post_list, key, **options)
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@rate_limit('follow', '30/m')
+@transaction.atomic
 def profile_follow(request, username):
-    author = User.objects.get(username=username)
-    if author != request.user:
-        Follow.objects.get_or_create(user=request.user, author=author)
+    author_id = get_object_or_404(
+        User.objects.values_list('pk', flat=True), username=username)
+    if author_id != request.user.pk:
+        follow(request.user.pk, author_id)
     return redirect('posts:profile', username=username)
 
 
 @login_required
+@rate_limit('follow', '30/m')
+@transaction.atomic
 def profile_unfollow(request, username):
-    author = User.objects.get(username=username)
-    follower = Follow.objects.filter(user=request.user, author=author)
-    if follower.exists():
-        follower.delete()
+    author_id = get_object_or_404(
+        User.objects.values_list('pk', flat=True), username=username)
+    unfollow(request.user.pk, author_id)
     return redirect('posts:profile', username=username)
@@ -0,0 +1,19 @@
+import os
+
+import django
+
+from core.warmup import warm_templates
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+if django.VERSION >= (3, 0):
+    from django.core.asgi import get_asgi_application
+
+    application = get_asgi_application()
+else:
+    from django.core.wsgi import get_wsgi_application
+
+    from core.asgi import ConcurrentWsgiToAsgi
+
+    application = ConcurrentWsgiToAsgi(get_wsgi_application())
+warm_templates()
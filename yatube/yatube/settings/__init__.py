@@ -0,0 +1,16 @@
+"""Настройки выбираются переменной окружения YATUBE_ENV: dev (по
+умолчанию), prod или bench. Профиль можно указать и напрямую, например
+DJANGO_SETTINGS_MODULE=yatube.settings.prod.
+"""
+import os
+
+ENVIRONMENT = os.getenv('YATUBE_ENV', 'dev')
+
+if ENVIRONMENT == 'prod':
+    from .prod import *  # noqa: F401,F403
+elif ENVIRONMENT == 'bench':
+    from .bench import *  # noqa: F401,F403
+elif ENVIRONMENT == 'dev':
+    from .dev import *  # noqa: F401,F403
+else:
+    raise ImportError(f'Неизвестный YATUBE_ENV: {ENVIRONMENT!r}')
@@ -0,0 +1,303 @@
+import os
+
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+SECRET_KEY = os.getenv(
+    'SECRET_KEY', 's7_71vdz72=e_9y)s9*z%kqis&*5(^l8^%&qea%1te$@(5a&!=')
+
+# При DEBUG Django хранит каждый SQL-запрос в connection.queries, поэтому
+# по умолчанию он выключен. Профиль dev включает его.
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver',
+]
+
+
+INSTALLED_APPS = [
+    'posts.apps.PostsConfig',
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'users.apps.UsersConfig',
+    'core.apps.CoreConfig',
+    'about.apps.AboutConfig',
+    'benchmarks.apps.BenchmarksConfig',
+    'api.apps.ApiConfig',
+    'sorl.thumbnail',
+]
+
+MIDDLEWARE = [
+    'core.instrumentation.RequestMetricsMiddleware',
+    'core.replicas.ReplicaMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+# Разобранные шаблоны держит в памяти загрузчик cached, правки шаблонов
+# тогда видны только после перезапуска. Профиль dev его выключает.
+CACHED_TEMPLATE_LOADERS = [
+    ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+]
+
+TEMPLATES = [
+    {
+        'BACKEND': 'core.instrumentation.MeasuredTemplates',
+        'DIRS': [os.path.join(BASE_DIR, 'templates')],
+        'OPTIONS': {
+            'loaders': CACHED_TEMPLATE_LOADERS,
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+# Точка входа для ASGI-серверов (uvicorn, daphne). На Django 2.2 каждый
+# запрос выполняется в своем потоке, см. core.asgi.
+ASGI_APPLICATION = 'yatube.asgi.application'
+
+# Независимые загрузки вьюх чтения (пост и страница комментариев)
+# выполняются одновременно в пуле из READ_CONCURRENCY потоков, у каждого
+# свое соединение с базой. При 0 они идут по очереди.
+READ_CONCURRENCY = 4
+
+# Настройки SQLite для нагрузки: WAL (читатели не ждут писателя),
+# ожидание блокировки вместо ошибки, synchronous=NORMAL (в WAL
+# безопасно при сбое процесса), mmap и кеш страниц на 64 МБ.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'busy_timeout': 20000,
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+}
+
+
+# База выбирается переменной DB_ENGINE: sqlite3 (по умолчанию) или любой
+# бэкенд из django.db.backends, например postgresql, с параметрами
+# подключения из DB_NAME, DB_USER, DB_PASSWORD, DB_HOST и DB_PORT.
+# Соединения живут DB_CONN_MAX_AGE секунд и переиспользуются.
+def database(default_name='db.sqlite3', conn_max_age=0):
+    engine = os.getenv('DB_ENGINE', 'sqlite3')
+    conn_max_age = int(os.getenv('DB_CONN_MAX_AGE', conn_max_age))
+    if engine == 'sqlite3':
+        return {
+            'ENGINE': 'core.backends.sqlite3',
+            'NAME': os.getenv(
+                'DB_NAME', os.path.join(BASE_DIR, default_name)),
+            'CONN_MAX_AGE': conn_max_age,
+            'OPTIONS': {'pragmas': SQLITE_PRAGMAS},
+        }
+    return {
+        'ENGINE': f'django.db.backends.{engine}',
+        'NAME': os.getenv('DB_NAME', 'yatube'),
+        'USER': os.getenv('DB_USER', ''),
+        'PASSWORD': os.getenv('DB_PASSWORD', ''),
+        'HOST': os.getenv('DB_HOST', ''),
+        'PORT': os.getenv('DB_PORT', ''),
+        'CONN_MAX_AGE': conn_max_age,
+    }
+
+
+def databases(**options):
+    """DATABASES с основной базой и репликой, если она задана."""
+    default = database(**options)
+    result = {'default': default}
+    if DATABASE_REPLICA_ALIAS:
+        result[DATABASE_REPLICA_ALIAS] = {
+            **default,
+            'NAME': os.getenv('DATABASE_REPLICA_NAME'),
+        }
+    return result
+
+
+# Чтения из запросов идут на реплику, если она задана: для проверки на
+# одной машине подойдет копия файла базы в DATABASE_REPLICA_NAME. После
+# записи запросы клиента READ_YOUR_WRITES_SECONDS секунд читают из
+# основной базы.
+DATABASE_REPLICA_ALIAS = (
+    'replica' if os.getenv('DATABASE_REPLICA_NAME') else None)
+DATABASES = databases()
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+READ_YOUR_WRITES_SECONDS = 5
+
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+
+STATIC_URL = '/static/'
+STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = 'posts:index_posts'
+PASSWORD_RESET_CONFIRM_URL = 'users:password_reset_confirm'
+PASSWORD_RESET_CONFIRM_REDIRECT_URL = 'users:password_reset_complete'
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+
+CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+# Лента подписок читается из заранее разложенной таблицы TimelineEntry.
+# Посты авторов, у которых подписчиков больше TIMELINE_FANOUT_LIMIT, не
+# раскладываются и читаются из постов напрямую. Раскладка включается
+# снова, когда подписчиков стало на TIMELINE_FANOUT_HYSTERESIS меньше.
+TIMELINE_ENABLED = True
+TIMELINE_FANOUT_LIMIT = 1000
+TIMELINE_FANOUT_HYSTERESIS = 100
+
+# Миниатюры картинок постов готовятся после сохранения поста в пуле
+# потоков из THUMBNAIL_WORKERS потоков. При 0 миниатюра готовится сразу
+# после коммита, в потоке запроса.
+THUMBNAIL_WORKERS = 2
+
+# Загрузки пишутся во временный файл кусками, картинка проверяется по
+# заголовку. Метаданные срезаются в том же пуле, что готовит миниатюры.
+FILE_UPLOAD_HANDLERS = ['posts.images.LimitedUploadHandler']
+IMAGE_MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+IMAGE_MAX_SIDE = 6000
+
+# Конфигурация текстового поиска PostgreSQL. В SQLite поиск идет по
+# таблице FTS5, ее токенизатор от языка не зависит.
+SEARCH_CONFIG = 'russian'
+
+# Главная, группы, профили и страницы постов для анонимов кешируются
+# целиком (posts.pagecache). Копия свежая PAGE_CACHE_TIMEOUT секунд и
+# пока не сдвинулись версии лент, устаревшую перерисовывает один процесс,
+# остальные до PAGE_CACHE_STALE_TIMEOUT отдают старую. При 0 выключено.
+PAGE_CACHE_TIMEOUT = 60
+PAGE_CACHE_STALE_TIMEOUT = 60 * 60
+PAGE_CACHE_LOCK_TIMEOUT = 10
+
+# Частота записи ограничивается декоратором core.ratelimit.rate_limit,
+# лимиты заданы у вьюх. Счетчики лежат в кеше default; в file и db incr
+# не атомарен, и при нескольких воркерах часть запросов не посчитается.
+RATE_LIMIT_ENABLED = True
+
+# Доля запросов, для которых RequestMetricsMiddleware считает SQL,
+# шаблоны, кеш и миниатюры и отдает их в Server-Timing и в лог
+# yatube.requests. При 0 замеры выключены.
+INSTRUMENTATION_SAMPLE_RATE = float(
+    os.getenv('INSTRUMENTATION_SAMPLE_RATE', 0))
+INSTRUMENTATION_SLOW_QUERIES = 3
+
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Общий кеш выбирается переменной окружения CACHE_BACKEND. file и db
+# работают без сети и видны всем воркерам на одной машине (для db нужна
+# команда createcachetable), memcached требует python-memcached, redis -
+# django-redis. CACHE_TWO_TIER=1 ставит перед общим кешем LRU в памяти
+# процесса. По умолчанию locmem, в профиле prod - file. incr и add
+# атомарны только в locmem, memcached и redis, для file и db проверка
+# core.W001 предупреждает о неточных лимитах и блокировке кеша страниц.
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION', os.path.join(BASE_DIR, 'cache')),
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', 'yatube_cache'),
+    },
+    'memcached': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', '127.0.0.1:11211'),
+    },
+    'redis': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', 'redis://127.0.0.1:6379/1'),
+    },
+}
+
+
+def caches(default_backend='locmem'):
+    backend = CACHE_BACKENDS[os.getenv('CACHE_BACKEND', default_backend)]
+    if os.getenv('CACHE_TWO_TIER'):
+        result = {
+            'default': {
+                'BACKEND': 'core.cache.TwoTierCache',
+                'LOCATION': 'shared',
+                'OPTIONS': {
+                    'LOCAL_MAX_ENTRIES': 500,
+                    'LOCAL_TIMEOUT': 5,
+                    'SHARED_ONLY_PREFIXES': ('feed-version:',),
+                },
+            },
+            'shared': backend,
+        }
+    else:
+        result = {'default': backend}
+    if INSTRUMENTATION_SAMPLE_RATE:
+        result['uninstrumented'] = result['default']
+        result['default'] = {
+            'BACKEND': 'core.instrumentation.MeasuredCache',
+            'LOCATION': 'uninstrumented',
+        }
+    return result
+
+
+CACHES = caches()
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'yatube.requests': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
@@ -0,0 +1,7 @@
+from .base import databases
+from .prod import *  # noqa: F401,F403
+
+# Замеры идут на отдельной базе, чтобы не смешивать синтетические данные
+# с рабочими, и без лимитов частоты, которые исказили бы нагрузку.
+DATABASES = databases(default_name='bench.sqlite3', conn_max_age=60)
+RATE_LIMIT_ENABLED = False
@@ -0,0 +1,14 @@
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import TEMPLATE_LOADERS, TEMPLATES
+
+DEBUG = True
+
+# Без кеша шаблонов правки видны сразу. TEMPLATE_CACHE=1 включает его,
+# чтобы проверить скорость как в prod.
+if not os.getenv('TEMPLATE_CACHE'):
+    TEMPLATES = [{
+        **TEMPLATES[0],
+        'OPTIONS': {**TEMPLATES[0]['OPTIONS'], 'loaders': TEMPLATE_LOADERS},
+    }]
@@ -0,0 +1,37 @@
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+from .base import MIDDLEWARE, caches, databases
+
+DEBUG = False
+
+# Ключ из репозитория известен всем, поэтому без своего ключа prod не
+# запускается.
+SECRET_KEY = os.getenv('SECRET_KEY')
+if not SECRET_KEY:
+    raise ImproperlyConfigured('Для профиля prod задайте SECRET_KEY.')
+
+if os.getenv('ALLOWED_HOSTS'):
+    ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS').split(',')
+
+# Соединения с базой живут между запросами.
+DATABASES = databases(conn_max_age=60)
+
+# Общий для воркеров кеш на диске: версии лент, ETag и лимиты частоты
+# должны совпадать во всех процессах. При нескольких воркерах лучше
+# CACHE_BACKEND=memcached или redis, см. core.W001.
+CACHES = caches(default_backend='file')
+
+# GZip снаружи, чтобы ConditionalGet считал ETag по несжатому ответу.
+# ConditionalGet отдает 304 и для страниц без своих валидаторов. Свои
+# страницы Last-Modified не отдают: по If-Modified-Since правку поста не
+# заметить.
+position = MIDDLEWARE.index('django.middleware.security.SecurityMiddleware')
+MIDDLEWARE = [
+    *MIDDLEWARE[:position + 1],
+    'django.middleware.gzip.GZipMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
+    *MIDDLEWARE[position + 1:],
+]